@@ -0,0 +1,38 @@
+"""add_hot_query_indexes
+
+Revision ID: 3f9a1c2d7b64
+Revises: 52c93bc841a7
+Create Date: 2026-10-19 09:12:40.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b64'
+down_revision: Union[str, None] = '52c93bc841a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_document_chunks_document_id_chunk_index', 'document_chunks', ['document_id', 'chunk_index'], unique=False)
+    op.create_index('ix_document_embeddings_document_id_chunk_index', 'document_embeddings', ['document_id', 'chunk_index'], unique=False)
+    op.create_index(op.f('ix_documents_owner_id'), 'documents', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_items_owner_id'), 'items', ['owner_id'], unique=False)
+    op.create_index(
+        'ix_users_id_with_google_credentials', 'users', ['id'], unique=False,
+        sqlite_where=sa.text('google_credentials IS NOT NULL'),
+        postgresql_where=sa.text('google_credentials IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_id_with_google_credentials', table_name='users')
+    op.drop_index(op.f('ix_items_owner_id'), table_name='items')
+    op.drop_index(op.f('ix_documents_owner_id'), table_name='documents')
+    op.drop_index('ix_document_embeddings_document_id_chunk_index', table_name='document_embeddings')
+    op.drop_index('ix_document_chunks_document_id_chunk_index', table_name='document_chunks')
@@ -0,0 +1,31 @@
+"""pack_document_embeddings
+
+Revision ID: a7d2e5c91f03
+Revises: 3f9a1c2d7b64
+Create Date: 2026-10-19 10:41:05.532904
+
+Adds the packed float32 column only. Existing JSON vectors are converted
+online, in batches, by migrate_embeddings.py; the legacy column is kept
+(nullable) until every row has been converted.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e5c91f03'
+down_revision: Union[str, None] = '3f9a1c2d7b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('document_embeddings', sa.Column('embedding', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    # Rows converted since the upgrade only exist in the packed column
+    op.drop_column('document_embeddings', 'embedding')
@@ -0,0 +1,44 @@
+"""add_drive_file_catalog
+
+Revision ID: c4e8b0f2a915
+Revises: a7d2e5c91f03
+Create Date: 2026-10-19 13:05:27.664170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8b0f2a915'
+down_revision: Union[str, None] = 'a7d2e5c91f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('drive_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('mime_type', sa.String(), nullable=True),
+    sa.Column('created_time', sa.String(), nullable=True),
+    sa.Column('modified_time', sa.String(), nullable=True),
+    sa.Column('synced_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('owner_id', 'file_id', name='uq_drive_files_owner_id_file_id')
+    )
+    op.create_index(op.f('ix_drive_files_id'), 'drive_files', ['id'], unique=False)
+    op.create_index('ix_drive_files_owner_id_id', 'drive_files', ['owner_id', 'id'], unique=False)
+    op.add_column('users', sa.Column('drive_changes_token', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'drive_changes_token')
+    op.drop_index('ix_drive_files_owner_id_id', table_name='drive_files')
+    op.drop_index(op.f('ix_drive_files_id'), table_name='drive_files')
+    op.drop_table('drive_files')
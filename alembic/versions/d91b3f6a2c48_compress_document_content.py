@@ -0,0 +1,88 @@
+"""compress_document_content
+
+Revision ID: d91b3f6a2c48
+Revises: c4e8b0f2a915
+Create Date: 2026-10-19 14:22:41.918305
+
+Document.content becomes compressed bytes (see app/column_types.py). On
+PostgreSQL the column changes from text to bytea; SQLite keeps its column and
+only the stored values change. Existing rows are rewritten in id order, in
+batches; rows that are already compressed are left alone.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.column_types import compress_text, decompress_text, is_compressed
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91b3f6a2c48'
+down_revision: Union[str, None] = 'c4e8b0f2a915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def _rewrite_content(convert) -> None:
+    connection = op.get_bind()
+    # Untyped, so values are written exactly as convert() returns them
+    documents = sa.table('documents', sa.column('id', sa.Integer), sa.column('content'))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, content FROM documents WHERE id > :last_id AND content IS NOT NULL "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        updates = []
+        for row in rows:
+            value = convert(row.content)
+            if value is not None:
+                updates.append({"document_id": row.id, "content": value})
+        if updates:
+            connection.execute(
+                documents.update().where(documents.c.id == sa.bindparam("document_id")),
+                updates
+            )
+        last_id = rows[-1].id
+
+
+def _compress(value):
+    data = value.encode('utf-8') if isinstance(value, str) else bytes(value)
+    if is_compressed(data):
+        return None
+    return compress_text(data.decode('utf-8', errors='replace'))
+
+
+def _decompress(value):
+    text = decompress_text(value)
+    # PostgreSQL still has a bytea column at this point; SQLite takes the text as is
+    return text.encode('utf-8') if op.get_bind().dialect.name == 'postgresql' else text
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column(
+            'documents', 'content',
+            type_=sa.LargeBinary(),
+            postgresql_using="convert_to(content, 'UTF8')"
+        )
+    _rewrite_content(_compress)
+
+
+def downgrade() -> None:
+    _rewrite_content(_decompress)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column(
+            'documents', 'content',
+            type_=sa.Text(),
+            postgresql_using="convert_from(content, 'UTF8')"
+        )
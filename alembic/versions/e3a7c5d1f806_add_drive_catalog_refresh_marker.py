@@ -0,0 +1,26 @@
+"""add_drive_catalog_refresh_marker
+
+Revision ID: e3a7c5d1f806
+Revises: d91b3f6a2c48
+Create Date: 2026-10-19 17:42:09.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c5d1f806'
+down_revision: Union[str, None] = 'd91b3f6a2c48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('drive_catalog_refresh_requested_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'drive_catalog_refresh_requested_at')
@@ -0,0 +1,73 @@
+"""
+Column types shared by the models.
+
+``CompressedText`` stores text as compressed bytes and hands back ``str``. The
+codec is recognised from the stored bytes, so rows written with zlib, zstd or
+as plain (legacy) text can all be read whatever ``document_compression`` is set
+to now.
+"""
+from typing import Optional, Union
+import zlib
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+from .config import settings
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZLIB_HEADER = 0x78
+
+
+def compress_text(text: str, codec: Optional[str] = None) -> bytes:
+    """Compress ``text`` with ``codec`` ("zlib", "zstd" or "none"), defaulting to the configured one."""
+    codec = codec or settings.document_compression
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        import zstandard  # optional dependency, only needed when zstd is configured
+        return zstandard.ZstdCompressor(level=settings.document_compression_level).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, settings.document_compression_level)
+    if codec == "none":
+        return data
+    raise ValueError(f"Unknown document compression {codec!r}; expected 'zlib', 'zstd' or 'none'")
+
+
+def is_compressed(data: bytes) -> bool:
+    return data.startswith(ZSTD_MAGIC) or (data[:1] == bytes([ZLIB_HEADER]) and _zlib_decompress(data) is not None)
+
+
+def _zlib_decompress(data: bytes) -> Optional[bytes]:
+    try:
+        return zlib.decompress(data)
+    except zlib.error:
+        return None  # plain text that happens to start with "x"
+
+
+def decompress_text(data: Union[bytes, str]) -> str:
+    """Inverse of ``compress_text`` for any codec; plain text passes through."""
+    if isinstance(data, str):
+        return data
+    data = bytes(data)
+    if data.startswith(ZSTD_MAGIC):
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif data[:1] == bytes([ZLIB_HEADER]):
+        decompressed = _zlib_decompress(data)
+        if decompressed is not None:
+            data = decompressed
+    return data.decode("utf-8", errors="replace")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored as compressed bytes."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
@@ -9,11 +9,23 @@ load_dotenv()
 class Settings(BaseSettings):
     # Database settings
     database_url: str = "sqlite:///./knowledge_assistant.db"
+    db_profile: str = "api"  # "api" or "worker"; Celery workers switch to "worker" at start
+    db_api_pool_size: int = 10
+    db_api_max_overflow: int = 20
+    db_worker_pool_size: int = 2
+
+    # SQLite tuning, applied to every connection
+    sqlite_journal_mode: str = "WAL"  # readers no longer block on a writing worker
+    sqlite_synchronous: str = "NORMAL"  # durable with WAL, far fewer fsyncs than FULL
+    sqlite_busy_timeout_ms: int = 30000  # wait for the write lock instead of "database is locked"
+    sqlite_mmap_size: int = 268435456  # 256 MB of memory-mapped reads
+    sqlite_cache_size: int = -65536  # negative means KiB: 64 MB page cache per connection
     
     # Authentication settings
     secret_key: str = "your-secret-key-here"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    password_hash_workers: int = 2  # threads allowed to run bcrypt at once
     
     # Google Drive settings
     google_client_id: str = ""
@@ -21,15 +33,64 @@ class Settings(BaseSettings):
     google_redirect_uri: str = "http://localhost:8002/api/v1/auth/google/callback"
     google_access_token: str = ""
     google_refresh_token: str = ""
+    google_token_refresh_margin_seconds: int = 300  # refresh access tokens this long before expiry
+    google_http_timeout_seconds: int = 60
+    drive_client_cache_size: int = 64  # cached Drive clients per thread
+    drive_download_chunk_bytes: int = 8 * 1024 * 1024  # bytes fetched per download request
+    drive_spool_max_bytes: int = 16 * 1024 * 1024  # larger downloads spill to a temp file on disk
+    drive_catalog_refresh_timeout_seconds: int = 30 * 60  # queue another first listing if one hasn't finished by then
     
     # Vector store settings
     embedding_model: str = "all-MiniLM-L6-v2"
     faiss_index_path: str = "./data/faiss_index.bin"
+
+    # Embedding backend: "sentence-transformers", "onnx" or "onnx-int8"
+    embedding_backend: str = "sentence-transformers"
+    onnx_model_dir: str = "./data/onnx"  # written by export_onnx_model.py
+    embedding_threads: int = 0  # 0 lets the runtime decide
+
+    # Chunking settings (measured in embedding model tokens)
+    chunk_max_tokens: int = 200
+    chunk_overlap_tokens: int = 40
+
+    # Ingestion settings
+    embedding_batch_size: int = 256  # texts per model.encode call
+    ingest_document_batch: int = 64  # documents gathered before embedding
+
+    # Document storage: "zlib", "zstd" (needs the zstandard package) or "none"
+    document_compression: str = "zlib"
+    document_compression_level: int = 6
+
+    # Direct upload settings
+    upload_dir: str = "./data/uploads"  # must be shared by the API and the workers that process uploads
+    upload_chunk_bytes: int = 1024 * 1024  # bytes read from the request per step
+    max_upload_bytes: int = 2 * 1024 * 1024 * 1024  # checked against Content-Length, then while receiving
     
     # Celery settings
     celery_broker_url: str = "redis://localhost:6379/0"
     celery_result_backend: str = "redis://localhost:6379/0"
+    celery_max_tasks_per_child: int = 50  # recycle a worker process after this many tasks
+    celery_max_memory_per_child_kb: int = 2_000_000  # ...or once its resident memory exceeds this
+    celery_interactive_concurrency: int = 2  # first syncs and uploads
+    celery_sync_concurrency: int = 2  # scheduled re-syncs
+    celery_bulk_concurrency: int = 1  # re-embeds
+    celery_resync_interval_seconds: int = 6 * 3600
     
+    # Metrics: Celery workers write snapshots here for the API's /metrics endpoint
+    metrics_dir: str = "./data/metrics"
+
+    # Per-request profiling (see app/profiling.py); off unless the header is sent or sampled
+    profiling_header: str = "X-Profile"
+    profiling_token: Optional[str] = None  # the header value must equal it; the header is ignored while unset
+    profiling_sample_rate: float = 0.0  # fraction of requests profiled without the header
+    profiling_mode: str = "sampling"  # "sampling" or "cprofile"
+    profiling_interval_ms: float = 5.0
+    profiling_dir: str = "./data/profiles"
+    profiling_max_profiles: int = 100  # older profiles are deleted
+
+    # Logging: DEBUG also logs per-chunk and per-file details
+    log_level: str = "INFO"
+
     # OpenAI Configuration
     openai_api_key: Optional[str] = None
 
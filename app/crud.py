@@ -1,4 +1,10 @@
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import numpy as np
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
 from . import models
 
 def get_user_by_email(db: Session, email: str):
@@ -17,4 +23,111 @@ def update_user_credentials(db: Session, user_id: int, credentials: dict):
         user.google_credentials = credentials
         db.commit()
         db.refresh(user)
-    return user 
\ No newline at end of file
+    return user
+
+def keyset_paginate(query: Query, id_column, after: Optional[int], limit: int) -> Dict[str, Any]:
+    """Return one page of ``query`` ordered by ``id_column``, starting after the ``after`` cursor.
+
+    Unlike OFFSET, the cost does not grow with page depth: the cursor is an
+    index seek on the id column.
+    """
+    if after is not None:
+        query = query.filter(id_column > after)
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    next_cursor = getattr(rows[limit - 1], id_column.key) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def create_user_async(db: AsyncSession, email: str):
+    user = models.User(email=email)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return user
+
+async def update_user_credentials_async(db: AsyncSession, user_id: int, credentials: dict):
+    user = await db.get(models.User, user_id)
+    if user:
+        user.google_credentials = credentials
+        await db.commit()
+        await db.refresh(user)
+    return user
+
+async def claim_catalog_refresh_async(db: AsyncSession, user_id: int, stale_before: datetime) -> bool:
+    """Mark a catalog refresh as queued for the user; False if one was already queued since ``stale_before``."""
+    requested_at = models.User.drive_catalog_refresh_requested_at
+    # One conditional UPDATE, so concurrent requests cannot both claim it
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id, or_(requested_at.is_(None), requested_at < stale_before))
+        .values(drive_catalog_refresh_requested_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+def clear_catalog_refresh(db: Session, user_id: int):
+    db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(drive_catalog_refresh_requested_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def replace_document_chunks(db: Session, document_id: int, chunks: List[str], embeddings: np.ndarray):
+    """Atomically replace a document's chunks: one delete and one executemany insert in a single transaction."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    rows = [
+        {
+            "content": chunk,
+            "embedding": embedding.tobytes(),
+            "document_id": document_id,
+            "chunk_index": i
+        }
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ]
+    try:
+        db.execute(delete(models.DocumentChunk).where(models.DocumentChunk.document_id == document_id))
+        if rows:
+            db.execute(insert(models.DocumentChunk), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+
+def convert_legacy_embeddings(db: Session, batch_size: int = 1000) -> Iterator[int]:
+    """Convert JSON DocumentEmbedding vectors to packed float32, one committed batch at a time.
+
+    Safe to run while the app is serving: rows are walked by id and each batch
+    is a short transaction. Yields the number of rows converted per batch.
+    """
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(models.DocumentEmbedding.id, models.DocumentEmbedding.embedding_vector)
+            .where(
+                models.DocumentEmbedding.id > last_id,
+                models.DocumentEmbedding.embedding_vector.isnot(None)
+            )
+            .order_by(models.DocumentEmbedding.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        db.execute(update(models.DocumentEmbedding), [
+            {
+                "id": row.id,
+                "embedding": np.asarray(json.loads(row.embedding_vector), dtype=np.float32).tobytes(),
+                "embedding_vector": None
+            }
+            for row in rows
+        ])
+        db.commit()
+        last_id = rows[-1].id
+        yield len(rows)
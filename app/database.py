@@ -1,17 +1,97 @@
-from sqlalchemy import create_engine
+import os
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-# Create SQLite engine
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+# Async drivers for the request path; Celery tasks keep using the sync engine
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite or asyncpg)."""
+    scheme, separator, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect in ASYNC_DRIVERS:
+        return f"{ASYNC_DRIVERS[dialect]}{separator}{rest}"
+    return url
+
+# Connection pool sizes per process type: the API serves many concurrent
+# requests, a prefork Celery worker process runs one task at a time
+DB_PROFILES = {
+    "api": {"pool_size": settings.db_api_pool_size, "max_overflow": settings.db_api_max_overflow},
+    "worker": {"pool_size": settings.db_worker_pool_size, "max_overflow": 0},
+}
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite concurrency settings to every new connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.execute(f"PRAGMA cache_size={settings.sqlite_cache_size}")
+    cursor.close()
+
+def _engine_options(url: str, profile: str) -> dict:
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}'. Expected one of: {', '.join(DB_PROFILES)}")
+    options = {"pool_pre_ping": not _is_sqlite(url)}
+    if _is_sqlite(url):
+        # In-memory databases live in a single connection, so pool sizing does not apply
+        if make_url(url).database in (None, "", ":memory:"):
+            return {}
+        options["connect_args"] = {
+            "check_same_thread": False,  # Needed for SQLite
+            "timeout": settings.sqlite_busy_timeout_ms / 1000
+        }
+    options.update(DB_PROFILES[profile])
+    return options
+
+def create_db_engine(url: str = None, profile: str = None) -> Engine:
+    """Create a sync engine tuned for the 'api' or 'worker' process profile."""
+    url = url or settings.database_url
+    new_engine = create_engine(url, **_engine_options(url, profile or settings.db_profile))
+    if _is_sqlite(url):
+        event.listen(new_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+# Create database engine
+engine = create_db_engine()
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def configure_engine(profile: str) -> Engine:
+    """Rebuild the sync engine for ``profile`` and rebind SessionLocal to it.
+
+    Meant to run right after a process fork: connections inherited from the
+    parent are dropped without being closed.
+    """
+    global engine
+    engine.dispose(close=False)
+    engine = create_db_engine(profile=profile)
+    SessionLocal.configure(bind=engine)
+    return engine
+
+# Async engine and session factory for FastAPI handlers
+async_engine = create_async_engine(get_async_database_url(settings.database_url))
+if _is_sqlite(settings.database_url):
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create base class for declarative models
 Base = declarative_base()
 
@@ -23,7 +103,61 @@ def get_db():
     finally:
         db.close()
 
-# Function to create all tables
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Schema that the old create_tables() startup hook produced, before Alembic was in charge
+BASELINE_REVISION = "52c93bc841a7"
+
+def _alembic_config() -> Config:
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "alembic"))
+    # Keep the process's logging as it is; alembic.ini's would disable the app's loggers
+    config.attributes["configure_logger"] = False
+    return config
+
+def _current_revisions(connection) -> set:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+def verify_schema():
+    """Fail fast unless the database is at the Alembic head revision."""
+    expected = set(ScriptDirectory.from_config(_alembic_config()).get_heads())
+    with engine.connect() as connection:
+        current = _current_revisions(connection)
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(expected)}. "
+            "Run `python init_db.py` to migrate it."
+        )
+
+def migrate_database(bind: Engine = None):
+    """Bring the database (``bind``, default the app's) to the Alembic head without touching existing data."""
+    from . import models  # noqa: F401 - registers the tables on Base.metadata
+
+    bind = bind or engine
+    config = _alembic_config()
+    config.attributes["engine"] = bind
+    with bind.connect() as connection:
+        current = _current_revisions(connection)
+        tables = set(inspect(connection).get_table_names()) - {"alembic_version"}
+
+    if not tables:
+        # Fresh database: build the current schema directly and record it
+        Base.metadata.create_all(bind=bind)
+        command.stamp(config, "head")
+    else:
+        if not current:
+            # Tables created by the old startup hook: adopt them, then upgrade
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+
+# Function to reset all tables (destroys all data; for local test scripts only)
 def create_tables():
+    from . import models  # noqa: F401 - registers the tables on Base.metadata
+
     Base.metadata.drop_all(bind=engine)  # Drop all existing tables
-    Base.metadata.create_all(bind=engine)  # Create all tables 
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)  # Create all tables
+    command.stamp(_alembic_config(), "head")
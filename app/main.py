@@ -1,15 +1,23 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from .routers import auth, users, items, google_auth, qa
-from .database import engine, SessionLocal, create_tables
+import logging
+from .routers import auth, users, items, google_auth, qa, documents
+from .database import SessionLocal, verify_schema
 from . import models
+from .config import settings
+from .metrics import render_prometheus
+from .profiling import ProfilingMiddleware
 from app.services.rag_service import RAGService
 from app.schemas import QuestionRequest, AnswerResponse
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+logging.basicConfig(
+    level=settings.log_level.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Knowledge Assistant",
@@ -26,6 +34,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profiles only requests that send the profiling header or are sampled
+app.add_middleware(
+    ProfilingMiddleware,
+    header=settings.profiling_header,
+    token=settings.profiling_token,
+    sample_rate=settings.profiling_sample_rate,
+    mode=settings.profiling_mode,
+    interval_ms=settings.profiling_interval_ms,
+    output_dir=settings.profiling_dir,
+    max_profiles=settings.profiling_max_profiles
+)
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -38,6 +58,7 @@ def get_db():
 app.include_router(auth.router, prefix="/api/v1", tags=["authentication"])
 app.include_router(users.router, prefix="/api/v1", tags=["users"])
 app.include_router(items.router, prefix="/api/v1", tags=["items"])
+app.include_router(documents.router, prefix="/api/v1", tags=["documents"])
 app.include_router(google_auth.router, prefix="/api/v1", tags=["google"])
 app.include_router(qa.router, prefix="/api/v1", tags=["question-answering"])
 
@@ -48,21 +69,24 @@ async def root():
         "status": "running"
     }
 
+# Prometheus text format; includes ingest metrics published by Celery workers
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_prometheus(settings.metrics_dir), media_type="text/plain; version=0.0.4")
+
+# Plain `def` so the blocking RAG pipeline runs in the threadpool, off the event loop
 @app.post("/api/v1/qa/answer", response_model=AnswerResponse)
-async def get_answer(request: QuestionRequest, db: Session = Depends(get_db)):
+def get_answer(request: QuestionRequest, db: Session = Depends(get_db)):
     try:
         rag_service = RAGService(db)
         answer = rag_service.get_answer(request.question)
         return {"answer": answer}
     except Exception as e:
-        print(f"Error in get_answer: {str(e)}")  # Log the error
+        logger.exception("Error in get_answer")
         return {"answer": f"I encountered an error while processing your request: {str(e)}"}
 
-# Create tables on startup
+# Refuse to start against a database that is not migrated; run `python init_db.py` first
 @app.on_event("startup")
 async def startup_event():
-    try:
-        create_tables()
-        print("Database tables created successfully")
-    except Exception as e:
-        print(f"Error creating tables: {str(e)}") 
\ No newline at end of file
+    verify_schema()
+    logger.info("Database schema is up to date") 
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""
+In-process metrics: latency histograms, counters and gauges, rendered in the
+Prometheus text exposition format by ``GET /metrics``.
+
+Celery worker processes write a JSON snapshot of their metrics to
+``settings.metrics_dir`` after every task, and the API merges those snapshots
+into its own output, so ingest stages show up on the same endpoint. When a
+worker process exits, its counters and histograms are folded into
+``retired.json`` and its snapshot is deleted, so totals survive process
+recycling without the directory growing.
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import glob
+import json
+import os
+import threading
+import time
+
+# Seconds; spans range from sub-millisecond lookups to multi-minute downloads
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+REGISTRY: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def snapshot(self) -> Dict[Tuple[str, ...], object]:
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def _copy(self, value):
+        return value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    @staticmethod
+    def merge(left: float, right: float) -> float:
+        return left + right
+
+    def render(self, values) -> Iterator[str]:
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{self._format_labels(key)} {value}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    @staticmethod
+    def merge(left: float, right: float) -> float:
+        return max(left, right)  # each process holds its own copy (e.g. of the FAISS index)
+
+    def render(self, values) -> Iterator[str]:
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{self._format_labels(key)} {value}"
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; each label set holds [bucket counts..., +Inf count], sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def _copy(self, value):
+        return [list(value[0]), value[1]]
+
+    @staticmethod
+    def merge(left, right):
+        return [[a + b for a, b in zip(left[0], right[0])], left[1] + right[1]]
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[int, float]]:
+        """Observation count and summed seconds per label set."""
+        return {key: (sum(state[0]), state[1]) for key, state in self.snapshot().items()}
+
+    def render(self, values) -> Iterator[str]:
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket{self._format_labels(key, ('le', repr(float(bound))))} {cumulative}"
+            cumulative += counts[-1]
+            yield f"{self.name}_bucket{self._format_labels(key, ('le', '+Inf'))} {cumulative}"
+            yield f"{self.name}_sum{self._format_labels(key)} {total}"
+            yield f"{self.name}_count{self._format_labels(key)} {cumulative}"
+
+
+@contextmanager
+def span(histogram: Histogram, **labels) -> Iterator[None]:
+    """Time the block and record it in ``histogram``, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+QA_STAGE_SECONDS = Histogram(
+    "qa_stage_seconds", "Time spent in each stage of answering a question.", ["stage"]
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "ingest_stage_seconds", "Time spent in each stage of ingesting documents.", ["stage"]
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Lookups in in-process caches by outcome.", ["cache", "result"]
+)
+INGESTED_ITEMS = Counter(
+    "ingested_items_total", "Documents and chunks written by ingestion.", ["kind"]
+)
+FAISS_INDEX_VECTORS = Gauge(
+    "faiss_index_vectors", "Vectors in the most recently loaded FAISS index."
+)
+
+
+RETIRED_SNAPSHOT = "retired.json"
+
+
+def _write_json(path: str, data: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(path: str):
+    """Write this process's metrics to ``path`` as JSON, atomically."""
+    _write_json(path, {
+        metric.name: [[list(key), value] for key, value in metric.snapshot().items()]
+        for metric in REGISTRY
+    })
+
+
+def _merge_snapshot(metric: _Metric, values: dict, snapshot: Dict[str, list]):
+    for key, value in snapshot.get(metric.name, []):
+        key = tuple(key)
+        values[key] = metric.merge(values[key], value) if key in values else value
+
+
+def retire_snapshot(path: str):
+    """Fold the snapshot at ``path`` into ``retired.json`` beside it, then delete it.
+
+    Counters and histograms keep their totals across recycled processes;
+    gauges describe a live process and go with it.
+    """
+    import fcntl  # worker processes only, which Celery's prefork pool runs on Unix
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "retired.lock"), "w") as lock:
+        # Processes exiting together must not lose each other's counts
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            snapshot = {}  # unreadable; drop it rather than keep reporting it
+
+        retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+        try:
+            with open(retired_path) as f:
+                retired = json.load(f)
+        except (OSError, ValueError):
+            retired = {}
+        merged = {}
+        for metric in REGISTRY:
+            if metric.kind == "gauge":
+                continue
+            values: dict = {}
+            _merge_snapshot(metric, values, retired)
+            _merge_snapshot(metric, values, snapshot)
+            merged[metric.name] = [[list(key), value] for key, value in values.items()]
+        _write_json(retired_path, merged)
+        os.remove(path)
+
+
+def _load_snapshots(directory: str) -> List[Dict[str, list]]:
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # being replaced or half-written; picked up next scrape
+    return snapshots
+
+
+def render_prometheus(snapshot_dir: Optional[str] = None) -> str:
+    """Render every metric, merged with worker snapshots from ``snapshot_dir``."""
+    snapshots = _load_snapshots(snapshot_dir) if snapshot_dir and os.path.isdir(snapshot_dir) else []
+    lines = []
+    for metric in REGISTRY:
+        values = metric.snapshot()
+        for snapshot in snapshots:
+            _merge_snapshot(metric, values, snapshot)
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render(values))
+    return "\n".join(lines) + "\n"
@@ -1,7 +1,8 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, JSON, Float, LargeBinary, Text
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, JSON, Float, LargeBinary, Text, Index, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
+from .column_types import CompressedText
 from .database import Base
 
 class User(Base):
@@ -12,11 +13,23 @@ class User(Base):
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     google_credentials = Column(JSON, nullable=True)
+    drive_changes_token = Column(String, nullable=True)  # Drive changes feed position for the catalog
+    drive_catalog_refresh_requested_at = Column(DateTime(timezone=True), nullable=True)  # set while one is queued
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     items = relationship("Item", back_populates="owner")
     documents = relationship("Document", back_populates="owner")
+    drive_files = relationship("DriveFile", back_populates="owner")
+
+    __table_args__ = (
+        # Partial index for "latest user with Google credentials" lookups
+        Index(
+            "ix_users_id_with_google_credentials", "id",
+            sqlite_where=text("google_credentials IS NOT NULL"),
+            postgresql_where=text("google_credentials IS NOT NULL")
+        ),
+    )
 
 class Item(Base):
     __tablename__ = "items"
@@ -24,7 +37,7 @@ class Item(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(String)
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
 
     owner = relationship("User", back_populates="items")
 
@@ -33,10 +46,11 @@ class Document(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String)
-    content = Column(Text)
+    # Compressed at rest and only loaded when accessed, so listings never read bodies
+    content = deferred(Column(CompressedText))
     mime_type = Column(String)
     google_file_id = Column(String, unique=True, index=True)
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -56,6 +70,10 @@ class DocumentChunk(Base):
 
     document = relationship("Document", back_populates="chunks")
 
+    __table_args__ = (
+        Index("ix_document_chunks_document_id_chunk_index", "document_id", "chunk_index"),
+    )
+
 class DocumentEmbedding(Base):
     __tablename__ = "document_embeddings"
 
@@ -63,7 +81,32 @@ class DocumentEmbedding(Base):
     document_id = Column(Integer, ForeignKey("documents.id"))
     chunk_index = Column(Integer)
     chunk_text = Column(String)
-    embedding_vector = Column(String)  # Store as JSON string for SQLite compatibility
+    embedding = Column(LargeBinary)  # Packed float32, same format as DocumentChunk.embedding
+    embedding_vector = Column(String, nullable=True)  # Legacy JSON; emptied by migrate_embeddings.py
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    document = relationship("Document", back_populates="embeddings") 
\ No newline at end of file
+    document = relationship("Document", back_populates="embeddings")
+
+    __table_args__ = (
+        Index("ix_document_embeddings_document_id_chunk_index", "document_id", "chunk_index"),
+    ) 
+
+class DriveFile(Base):
+    """Local catalog of a user's Google Drive file metadata, kept fresh from the changes feed."""
+    __tablename__ = "drive_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    file_id = Column(String, nullable=False)
+    name = Column(String)
+    mime_type = Column(String)
+    created_time = Column(String)  # RFC 3339, as returned by Drive
+    modified_time = Column(String)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    owner = relationship("User", back_populates="drive_files")
+
+    __table_args__ = (
+        UniqueConstraint("owner_id", "file_id", name="uq_drive_files_owner_id_file_id"),
+        Index("ix_drive_files_owner_id_id", "owner_id", "id"),
+    )
@@ -0,0 +1,220 @@
+"""
+Opt-in per-request profiling as pure ASGI middleware.
+
+A request is profiled when it carries the profiling header with the
+configured ``token``, or is picked by ``sample_rate``. Without a token the
+header is ignored, so clients cannot start profiles on their own. Requests
+that are not picked go straight to the app: the check is a scan of the
+request headers, nothing is wrapped and no profiler is started.
+
+Profiled requests write to ``<output_dir>/<request_id>/``:
+
+- ``stacks.folded``: sampled stacks in folded format, ready for flamegraph.pl
+  or speedscope
+- ``summary.txt``: the hottest functions by self and total samples
+- ``profile.prof`` and ``profile.txt``: cProfile output, in "cprofile" mode
+- ``request.json``: method, path, status and wall time
+
+Only the newest ``max_profiles`` directories are kept.
+
+The sampler reads every busy thread, so sync handlers running in the
+threadpool are covered. Concurrent requests can show up in the same profile.
+cProfile only sees the event-loop thread, i.e. async handlers.
+"""
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+# Leaf frames of threads that are parked, not working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+}
+_SAFE_REQUEST_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the Python stacks of all busy threads at a fixed interval."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        sampler_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            self.samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == sampler_ident:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, limit: int = 30) -> str:
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]  # drop the thread name
+            if frames:
+                self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+
+        lines = [f"{self.samples} samples at {self.interval * 1000:.1f} ms", "", "self samples:"]
+        lines += [f"{count:8d}  {frame}" for frame, count in self_counts.most_common(limit)]
+        lines += ["", "total samples:"]
+        lines += [f"{count:8d}  {frame}" for frame, count in total_counts.most_common(limit)]
+        return "\n".join(lines) + "\n"
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app,
+        header: str = "X-Profile",
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        mode: str = "sampling",
+        interval_ms: float = 5.0,
+        output_dir: str = "./data/profiles",
+        max_profiles: int = 100
+    ):
+        if mode not in ("sampling", "cprofile"):
+            raise ValueError(f"Unknown profiling mode {mode!r}; expected 'sampling' or 'cprofile'")
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.token = token
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self.max_profiles = max_profiles
+        self._cprofile_active = False  # one cProfile per thread; the event loop is a single thread
+
+    def _triggered(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        for name, value in headers:
+            if name == self.header:
+                return bool(self.token) and value.decode("latin-1") == self.token
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _request_id(self, headers: List[Tuple[bytes, bytes]]) -> str:
+        for name, value in headers:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                # A reused id gets a fresh one instead of overwriting the earlier profile
+                if _SAFE_REQUEST_ID.match(candidate) and not os.path.exists(os.path.join(self.output_dir, candidate)):
+                    return candidate
+        return uuid.uuid4().hex
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._triggered(scope.get("headers", [])):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self._request_id(scope["headers"])
+        status: Dict[str, int] = {}
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        sampler = StackSampler(self.interval)
+        profiler = None
+        if self.mode == "cprofile" and not self._cprofile_active:
+            profiler = cProfile.Profile()
+            self._cprofile_active = True
+        started = time.perf_counter()
+        sampler.start()
+        if profiler:
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            if profiler:
+                profiler.disable()
+                self._cprofile_active = False
+            sampler.stop()
+            elapsed = time.perf_counter() - started
+            request = {
+                "request_id": request_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status.get("code"),
+                "seconds": round(elapsed, 6),
+                "mode": "cprofile" if profiler else "sampling"
+            }
+            # File writes stay off the event loop
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._write, request_id, request, sampler, profiler
+            )
+
+    def _write(self, request_id: str, request: dict, sampler: StackSampler, profiler: Optional[cProfile.Profile]):
+        directory = os.path.join(self.output_dir, request_id)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "request.json"), "w") as f:
+            json.dump(request, f, indent=2)
+        with open(os.path.join(directory, "stacks.folded"), "w") as f:
+            f.write(sampler.folded())
+        with open(os.path.join(directory, "summary.txt"), "w") as f:
+            f.write(sampler.summary())
+        if profiler:
+            profiler.dump_stats(os.path.join(directory, "profile.prof"))
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(50)
+            with open(os.path.join(directory, "profile.txt"), "w") as f:
+                f.write(text.getvalue())
+        self._prune()
+
+    def _prune(self):
+        """Delete the oldest profiles beyond ``max_profiles``."""
+        entries = [entry for entry in os.scandir(self.output_dir) if entry.is_dir()]
+        if len(entries) <= self.max_profiles:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_profiles]:
+            shutil.rmtree(entry.path, ignore_errors=True)
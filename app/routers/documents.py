@@ -0,0 +1,194 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from typing import List, Optional
+import os
+import tempfile
+from .. import models, schemas
+from ..config import settings
+from ..crud import keyset_paginate
+from ..database import get_async_db, get_db
+from ..tasks.celery_app import celery_app
+from ..tasks.document_upload import process_uploaded_file
+
+router = APIRouter()
+
+UPLOAD_MIME_TYPES = {
+    ".txt": "text/plain",
+    ".md": "text/markdown",
+    ".markdown": "text/markdown",
+    ".pdf": "application/pdf",
+}
+
+# The endpoint reads the body itself, so describe the form for the OpenAPI docs
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}}
+        }}}
+    }
+}
+
+class _FilePart:
+    """Multipart parser callbacks that keep the first ``file`` part's data and skip everything else."""
+
+    def __init__(self, field_name: str = "file"):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.complete = False
+        self.pending: List[bytes] = []
+        self._header_name = self._header_value = self._disposition = b""
+        self._active = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self):
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        self._active = (
+            self.filename is None
+            and options.get(b"name") == self.field_name.encode()
+            and b"filename" in options
+        )
+        if self._active:
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._active:
+            self.pending.append(data[start:end])
+
+    def _on_part_end(self):
+        if self._active:
+            self.complete = True
+            self._active = False
+
+@router.get("/documents/", response_model=schemas.Page[schemas.DocumentSummary])
+def read_documents(
+    owner_id: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """List documents without loading their content."""
+    query = db.query(models.Document).options(load_only(
+        models.Document.id,
+        models.Document.title,
+        models.Document.mime_type,
+        models.Document.google_file_id,
+        models.Document.owner_id,
+        models.Document.created_at,
+        models.Document.updated_at
+    ))
+    if owner_id is not None:
+        query = query.filter(models.Document.owner_id == owner_id)
+    return keyset_paginate(query, models.Document.id, after, limit)
+
+@router.post(
+    "/users/{user_id}/documents/upload",
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=UPLOAD_REQUEST_BODY
+)
+async def upload_document(
+    user_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Upload a text, markdown or PDF file (form field ``file``) for the RAG store.
+    The file part is written to ``upload_dir`` as it arrives and processed in the
+    background; poll the job id. Workers read the file from ``upload_dir``, so it
+    must be on storage the API and the workers share.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the {settings.max_upload_bytes} byte limit"
+        )
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body")
+    if await db.get(models.User, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    part = _FilePart()
+    parser = MultipartParser(params[b"boundary"], part.callbacks())
+    out = path = mime_type = None
+    size = 0
+    accepted = False
+    try:
+        # Starlette's form parsing would spool the whole body before this handler ran;
+        # reading the stream here lets size and type checks stop an upload early
+        async for received in request.stream():
+            parser.write(received)
+            if part.filename is not None and out is None:
+                extension = os.path.splitext(part.filename)[1].lower()
+                mime_type = UPLOAD_MIME_TYPES.get(extension)
+                if not mime_type:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail=f"Unsupported file type. Expected one of: {', '.join(UPLOAD_MIME_TYPES)}"
+                    )
+                os.makedirs(settings.upload_dir, exist_ok=True)
+                fd, path = tempfile.mkstemp(dir=settings.upload_dir, suffix=extension)
+                out = os.fdopen(fd, "wb")
+            if part.pending:
+                data = b"".join(part.pending)
+                part.pending.clear()
+                size += len(data)
+                if size > settings.max_upload_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File exceeds the {settings.max_upload_bytes} byte upload limit"
+                    )
+                await run_in_threadpool(out.write, data)
+        parser.finalize()
+        if not part.complete:
+            raise HTTPException(status_code=422, detail="Missing form field: file")
+        accepted = True
+    except MultipartParseError:
+        raise HTTPException(status_code=400, detail="Malformed multipart body") from None
+    finally:
+        if out is not None:
+            out.close()
+        if path is not None and not accepted:
+            os.remove(path)
+
+    job = process_uploaded_file.delay(path, part.filename, mime_type, user_id)
+    return {"job_id": job.id, "status": "queued", "bytes": size}
+
+@router.get("/documents/uploads/{job_id}")
+def upload_status(job_id: str):
+    """Report the state of an upload job, and its result once finished."""
+    result = celery_app.AsyncResult(job_id)
+    response = {"job_id": job_id, "status": result.state.lower()}
+    if result.ready():
+        response["result"] = result.result if result.successful() else str(result.result)
+    return response
@@ -1,13 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
-from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import json
 import requests
 from .. import models
-from ..database import get_db
+from ..database import AsyncSessionLocal, get_async_db
+from ..services.drive_catalog import catalog_page_statement, catalog_row_to_file
 from ..services.google_drive import GoogleDriveService
-from ..tasks.document_sync import sync_user_documents
+from ..tasks.celery_app import INTERACTIVE_QUEUE
+from ..tasks.document_sync import refresh_drive_catalog, sync_user_documents
 from ..config import settings
-from ..crud import get_user_by_email, create_user, update_user_credentials
+from ..crud import (
+    get_user_by_email_async, create_user_async, update_user_credentials_async, claim_catalog_refresh_async
+)
 import secrets
 import httpx
 
@@ -34,48 +43,72 @@ async def google_login():
 @router.get("/files")
 async def list_files(
     mime_types: str = Query(None),
-    db: Session = Depends(get_db)
+    after: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List files from Google Drive with optional MIME type filter."""
-    try:
-        # Get the latest user with Google credentials
-        user = db.query(models.User).filter(models.User.google_credentials.isnot(None)).order_by(models.User.id.desc()).first()
-        if not user or not user.google_credentials:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="No authenticated Google user found"
-            )
-
-        # Initialize Google Drive service
-        drive_service = GoogleDriveService(user.google_credentials)
-
-        # Parse MIME types if provided
-        mime_type_list = mime_types.split(',') if mime_types else None
-
-        # List files
-        files = drive_service.list_files(mime_type_list)
-        return {"files": files}
-
-    except Exception as e:
+    """
+    List files from the local Drive catalog with optional MIME type filter.
+    Pass ``next_cursor`` back as ``after`` for the next page.
+    """
+    # Get the latest user with Google credentials
+    result = await db.execute(
+        select(models.User).where(models.User.google_credentials.isnot(None)).order_by(models.User.id.desc()).limit(1)
+    )
+    user = result.scalars().first()
+    if not user or not user.google_credentials:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to list files: {str(e)}"
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No authenticated Google user found"
         )
 
+    # The catalog is filled in the background; until then serve whatever it has.
+    # Clients poll while it fills, so only the first request queues the listing.
+    catalog_ready = user.drive_changes_token is not None
+    if not catalog_ready:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.drive_catalog_refresh_timeout_seconds)
+        if await claim_catalog_refresh_async(db, user.id, stale_before):
+            refresh_drive_catalog.apply_async(args=[user.id], queue=INTERACTIVE_QUEUE)
+
+    # Parse MIME types if provided
+    mime_type_list = mime_types.split(',') if mime_types else None
+    statement = catalog_page_statement(user.id, after, limit, mime_type_list)
+
+    async def stream_page():
+        yield f'{{"catalog_ready": {json.dumps(catalog_ready)}, "files": ['
+        # The body streams after the handler returns, so it can't rely on the request's session
+        async with AsyncSessionLocal() as session:
+            rows = await session.stream(statement)
+            count = 0
+            last_id = next_cursor = None
+            async for row in rows:
+                if count == limit:
+                    # The extra row only proves there is a next page; it resumes after the last one sent
+                    next_cursor = last_id
+                    break
+                yield ("," if count else "") + json.dumps(catalog_row_to_file(row))
+                count += 1
+                last_id = row.id
+            await rows.close()
+        yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+    return StreamingResponse(stream_page(), media_type="application/json")
+
 @router.get("/callback")
 async def google_callback(
     request: Request,
     code: str = Query(None),
     state: str = Query(None),
     error: str = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     if error:
         raise HTTPException(status_code=400, detail=f"Authorization failed: {error}")
 
     try:
         flow = GoogleDriveService.get_oauth_flow()
-        flow.fetch_token(
+        await run_in_threadpool(
+            flow.fetch_token,
             authorization_response=str(request.url),
             code=code
         )
@@ -92,7 +125,8 @@ async def google_callback(
             'token_uri': flow.credentials.token_uri,
             'client_id': flow.credentials.client_id,
             'client_secret': flow.credentials.client_secret,
-            'scopes': flow.credentials.scopes
+            'scopes': flow.credentials.scopes,
+            'expiry': flow.credentials.expiry.isoformat() if flow.credentials.expiry else None
         }
 
         # Get user info from Google
@@ -109,15 +143,15 @@ async def google_callback(
             raise HTTPException(status_code=400, detail="Failed to get email from Google")
 
         # Create or update user
-        user = get_user_by_email(db, email=email)
+        user = await get_user_by_email_async(db, email=email)
         if not user:
-            user = create_user(db, email=email)
+            user = await create_user_async(db, email=email)
 
         # Store Google credentials
-        update_user_credentials(db, user.id, credentials)
+        await update_user_credentials_async(db, user.id, credentials)
 
-        # Start document sync
-        sync_user_documents.delay(user.id)
+        # Start document sync ahead of scheduled re-syncs, so the user's documents show up quickly
+        sync_user_documents.apply_async(args=[user.id], queue=INTERACTIVE_QUEUE)
 
         return RedirectResponse(url="/docs")
 
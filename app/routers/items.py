@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 from .. import models, schemas
+from ..crud import keyset_paginate
 from ..database import get_db
 
 router = APIRouter()
@@ -19,10 +20,13 @@ def create_item_for_user(
     db.refresh(db_item)
     return db_item
 
-@router.get("/items/", response_model=List[schemas.Item])
-def read_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    items = db.query(models.Item).offset(skip).limit(limit).all()
-    return items
+@router.get("/items/", response_model=schemas.Page[schemas.Item])
+def read_items(
+    after: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    return keyset_paginate(db.query(models.Item), models.Item.id, after, limit)
 
 @router.get("/items/{item_id}", response_model=schemas.Item)
 def read_item(item_id: int, db: Session = Depends(get_db)):
@@ -11,8 +11,10 @@ router = APIRouter(prefix="/qa", tags=["question-answering"])
 class QuestionRequest(BaseModel):
     question: str
 
+# Plain `def`: retrieval is blocking (model encode, FAISS, sync DB), so FastAPI
+# runs it in its threadpool instead of on the event loop.
 @router.post("/ask")
-async def ask_question(
+def ask_question(
     request: QuestionRequest,
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session, selectinload
+from typing import Optional
 from .. import models, schemas
+from ..crud import keyset_paginate
 from ..database import get_db
 from .auth import get_password_hash
 
@@ -19,10 +20,15 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db.refresh(db_user)
     return db_user
 
-@router.get("/users/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(models.User).offset(skip).limit(limit).all()
-    return users
+@router.get("/users/", response_model=schemas.Page[schemas.User])
+def read_users(
+    after: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    # Items are loaded for the whole page in one extra query instead of one per user
+    query = db.query(models.User).options(selectinload(models.User.items))
+    return keyset_paginate(query, models.User.id, after, limit)
 
 @router.get("/users/{user_id}", response_model=schemas.User)
 def read_user(user_id: int, db: Session = Depends(get_db)):
@@ -1,7 +1,14 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Generic, TypeVar
 from datetime import datetime
 
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """One page of a keyset-paginated listing; pass next_cursor as `after` to continue."""
+    items: List[T]
+    next_cursor: Optional[int] = None
+
 class ItemBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -59,6 +66,18 @@ class Document(DocumentBase):
     class Config:
         from_attributes = True
 
+class DocumentSummary(BaseModel):
+    id: int
+    title: Optional[str] = None
+    mime_type: Optional[str] = None
+    google_file_id: Optional[str] = None
+    owner_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 class DocumentEmbeddingBase(BaseModel):
     chunk_index: int
     chunk_text: str
@@ -0,0 +1,195 @@
+"""
+Bulk re-embedding of every DocumentChunk across a pool of processes.
+
+Chunk ids are split into contiguous shards. Each worker process loads its own
+model with a fixed thread count, embeds one shard at a time and writes the
+vectors into a slot of a shared-memory float32 buffer, so only chunk ids travel
+back over the pipe. The parent copies finished slots into the database and
+records the shard in a checkpoint file, so an interrupted run can resume.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context, shared_memory
+from typing import Dict, Iterator, List, NamedTuple, Optional
+import json
+import os
+import time
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import create_db_engine
+from ..models import DocumentChunk
+
+
+class Shard(NamedTuple):
+    first_id: int
+    last_id: int  # inclusive
+    rows: int
+
+
+class ShardResult(NamedTuple):
+    shard: Shard
+    slot: int
+    pid: int
+    chunk_ids: List[int]
+    seconds: float
+
+
+def plan_shards(db: Session, shard_size: int) -> Iterator[Shard]:
+    """Walk chunk ids in order and cut them into shards of ``shard_size`` rows."""
+    first_id = last_id = None
+    rows = 0
+    statement = select(DocumentChunk.id).order_by(DocumentChunk.id).execution_options(yield_per=10_000)
+    for chunk_id in db.execute(statement).scalars():
+        if first_id is None:
+            first_id = chunk_id
+        last_id = chunk_id
+        rows += 1
+        if rows == shard_size:
+            yield Shard(first_id, last_id, rows)
+            first_id, rows = None, 0
+    if first_id is not None:
+        yield Shard(first_id, last_id, rows)
+
+
+class Checkpoint:
+    """Completed shard ranges for one backend/model, persisted as JSON."""
+
+    def __init__(self, path: str, backend: str, model: str):
+        self.path = path
+        self.backend = backend
+        self.model = model
+        self.completed: List[List[int]] = []
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            state = json.load(f)
+        if state.get("backend") != self.backend or state.get("model") != self.model:
+            raise ValueError(
+                f"Checkpoint {self.path} was written for {state.get('backend')}/{state.get('model')}; "
+                "pass --restart to discard it"
+            )
+        self.completed = state.get("completed", [])
+
+    def is_done(self, shard: Shard) -> bool:
+        return any(first <= shard.first_id and shard.last_id <= last for first, last in self.completed)
+
+    def mark_done(self, shard: Shard):
+        self.completed.append([shard.first_id, shard.last_id])
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"backend": self.backend, "model": self.model, "completed": self.completed}, f)
+        os.replace(tmp_path, self.path)  # atomic, so a crash never leaves a torn checkpoint
+
+
+# Per-process state, set up by _init_worker in each pool process
+_worker_state: Dict[str, object] = {}
+
+
+def _init_worker(database_url: str, backend: str, threads: int, shm_name: str, shape: tuple):
+    settings.embedding_threads = threads
+    from .embeddings import get_embedding_model
+    _worker_state["model"] = get_embedding_model(backend)
+    _worker_state["engine"] = create_db_engine(database_url, profile="worker")
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state["shm"] = shm  # keep a reference so the mapping stays alive
+    _worker_state["buffer"] = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+
+
+def _embed_shard(shard: Shard, slot: int, slot_rows: int, batch_size: int) -> ShardResult:
+    start = time.perf_counter()
+    with _worker_state["engine"].connect() as connection:
+        rows = connection.execute(
+            select(DocumentChunk.id, DocumentChunk.content)
+            .where(DocumentChunk.id >= shard.first_id, DocumentChunk.id <= shard.last_id)
+            .order_by(DocumentChunk.id)
+            # Rows added to the range since planning must not spill into the next slot;
+            # they were written by the live pipeline, already with the current model
+            .limit(shard.rows)
+        ).all()
+    chunk_ids = [row.id for row in rows]
+    if rows:
+        embeddings = _worker_state["model"].encode(
+            [row.content or "" for row in rows], batch_size=batch_size, show_progress_bar=False
+        )
+        _worker_state["buffer"][slot * slot_rows:slot * slot_rows + len(rows)] = embeddings
+    return ShardResult(shard, slot, os.getpid(), chunk_ids, time.perf_counter() - start)
+
+
+def reembed_all_chunks(
+    db: Session,
+    workers: int,
+    threads: int,
+    shard_size: int,
+    checkpoint_path: str,
+    backend: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> Dict[int, Dict[str, float]]:
+    """Re-embed every chunk and return rows, seconds and rows/s per worker pid."""
+    from .embeddings import get_embedding_model
+    backend = backend or settings.embedding_backend
+    batch_size = batch_size or settings.embedding_batch_size
+    dimension = get_embedding_model(backend).get_sentence_embedding_dimension()
+
+    checkpoint = Checkpoint(checkpoint_path, backend, settings.embedding_model)
+    checkpoint.load()
+    shards = [shard for shard in plan_shards(db, shard_size) if not checkpoint.is_done(shard)]
+    print(f"{len(shards)} shards to embed ({len(checkpoint.completed)} already done)")
+    if not shards:
+        return {}
+
+    # Two slots per worker keep every process busy while the parent writes results
+    slots = workers * 2
+    shape = (slots * shard_size, dimension)
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 4)
+    buffer = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    per_worker: Dict[int, Dict[str, float]] = {}
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.database_url, backend, threads, shm.name, shape)
+        ) as pool:
+            free_slots = list(range(slots))
+            pending = set()
+            remaining = iter(shards)
+            while True:
+                while free_slots:
+                    shard = next(remaining, None)
+                    if shard is None:
+                        break
+                    pending.add(pool.submit(_embed_shard, shard, free_slots.pop(), shard_size, batch_size))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    offset = result.slot * shard_size
+                    vectors = buffer[offset:offset + len(result.chunk_ids)]
+                    db.execute(update(DocumentChunk), [
+                        {"id": chunk_id, "embedding": vector.tobytes()}
+                        for chunk_id, vector in zip(result.chunk_ids, vectors)
+                    ])
+                    db.commit()
+                    checkpoint.mark_done(result.shard)
+                    free_slots.append(result.slot)
+
+                    stats = per_worker.setdefault(result.pid, {"rows": 0, "seconds": 0.0})
+                    stats["rows"] += len(result.chunk_ids)
+                    stats["seconds"] += result.seconds
+                    total = sum(worker["rows"] for worker in per_worker.values())
+                    print(f"Shard {result.shard.first_id}-{result.shard.last_id} done by {result.pid}; "
+                          f"{total} chunks at {total / (time.perf_counter() - started):.1f} chunks/s")
+    finally:
+        del buffer
+        shm.close()
+        shm.unlink()
+
+    for stats in per_worker.values():
+        stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    return per_worker
@@ -0,0 +1,144 @@
+from typing import Callable, Iterator, List, NamedTuple, Optional
+import re
+
+# Sentence boundaries: terminal punctuation followed by whitespace, or a blank line.
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+WORD = re.compile(r'\S+')
+# Rough stand-in for a WordPiece tokenizer: words and individual punctuation marks.
+APPROX_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+
+def approximate_token_count(text: str) -> int:
+    """Cheap token estimate used when no model tokenizer is available."""
+    return sum(1 for _ in APPROX_TOKEN.finditer(text))
+
+
+class Chunk(NamedTuple):
+    text: str
+    start: int  # offset of the first character in the source text
+    end: int  # offset one past the last character in the source text
+    token_count: int
+
+
+class _Span(NamedTuple):
+    start: int
+    end: int
+    tokens: int
+
+
+class TextChunker:
+    """Single-pass, token-aware text chunker.
+
+    Text is split into sentences, sentences are packed into chunks until the
+    token budget is reached, and the tail of each chunk (up to ``overlap_tokens``)
+    is carried into the next one. Every sentence is counted once and enters and
+    leaves the window once, so the work is linear in the input size.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 200,
+        overlap_tokens: int = 40,
+        token_counter: Optional[Callable[[str], int]] = None
+    ):
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be between 0 and max_tokens - 1")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = token_counter or approximate_token_count
+
+    def iter_chunks(self, text: str) -> Iterator[Chunk]:
+        """Yield chunks of ``text`` in order."""
+        if not text or not text.strip():
+            return
+
+        window: List[_Span] = []
+        window_tokens = 0
+        last_emitted_end = 0
+
+        for span in self._iter_spans(text):
+            if window and window_tokens + span.tokens > self.max_tokens:
+                yield self._make_chunk(text, window, window_tokens)
+                last_emitted_end = window[-1].end
+                # Keep the trailing sentences that fit in the overlap budget.
+                keep = 0
+                kept_tokens = 0
+                for kept in reversed(window):
+                    if kept_tokens + kept.tokens > self.overlap_tokens:
+                        break
+                    kept_tokens += kept.tokens
+                    keep += 1
+                # The overlap must leave room for the incoming span, otherwise
+                # the next chunk would repeat the previous one.
+                while keep and kept_tokens + span.tokens > self.max_tokens:
+                    kept_tokens -= window[-keep].tokens
+                    keep -= 1
+                window = window[len(window) - keep:] if keep else []
+                window_tokens = kept_tokens
+            window.append(span)
+            window_tokens += span.tokens
+
+        if window and window[-1].end > last_emitted_end:
+            yield self._make_chunk(text, window, window_tokens)
+
+    def split(self, text: str) -> List[str]:
+        """Return the chunk texts as a list."""
+        return [chunk.text for chunk in self.iter_chunks(text)]
+
+    def _make_chunk(self, text: str, window: List[_Span], tokens: int) -> Chunk:
+        start, end = window[0].start, window[-1].end
+        return Chunk(text[start:end], start, end, tokens)
+
+    def _iter_spans(self, text: str) -> Iterator[_Span]:
+        """Yield sentence spans, splitting any sentence that exceeds the budget."""
+        position = 0
+        for boundary in SENTENCE_BOUNDARY.finditer(text):
+            yield from self._sentence_spans(text, position, boundary.start())
+            position = boundary.end()
+        yield from self._sentence_spans(text, position, len(text))
+
+    def _sentence_spans(self, text: str, start: int, end: int) -> Iterator[_Span]:
+        # Trim surrounding whitespace so chunks start and end on content.
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start >= end:
+            return
+
+        tokens = max(1, self.count_tokens(text[start:end]))
+        if tokens <= self.max_tokens:
+            yield _Span(start, end, tokens)
+            return
+
+        # Oversized sentence: fall back to packing whole words.
+        piece_start = None
+        piece_end = start
+        piece_tokens = 0
+        for word in WORD.finditer(text, start, end):
+            word_tokens = max(1, self.count_tokens(word.group()))
+            if word_tokens > self.max_tokens:
+                if piece_start is not None:
+                    yield _Span(piece_start, piece_end, piece_tokens)
+                    piece_start, piece_tokens = None, 0
+                yield from self._word_spans(word.start(), word.end(), word_tokens)
+                continue
+            if piece_start is not None and piece_tokens + word_tokens > self.max_tokens:
+                yield _Span(piece_start, piece_end, piece_tokens)
+                piece_start, piece_tokens = None, 0
+            if piece_start is None:
+                piece_start = word.start()
+            piece_end = word.end()
+            piece_tokens += word_tokens
+        if piece_start is not None:
+            yield _Span(piece_start, piece_end, piece_tokens)
+
+    def _word_spans(self, start: int, end: int, tokens: int) -> Iterator[_Span]:
+        """Cut a single oversized word into character slices that fit the budget."""
+        step = max(1, (end - start) * self.max_tokens // tokens)
+        for piece_start in range(start, end, step):
+            piece_end = min(piece_start + step, end)
+            piece_tokens = tokens * (piece_end - piece_start) // (end - start)
+            yield _Span(piece_start, piece_end, min(self.max_tokens, max(1, piece_tokens)))
@@ -0,0 +1,225 @@
+"""
+Streaming export and import of a user's corpus: documents, chunks and vectors.
+
+An export is a directory with:
+
+- ``manifest.json``: format version, counts, embedding model and dimension
+- ``documents.ndjson``: one JSON object per document, including its content
+- ``chunks.ndjson``: one JSON object per chunk, ordered by document and chunk index
+- ``vectors.f32``: one little-endian float32 row per line of ``chunks.ndjson``
+
+Both directions stream in fixed-size batches, so memory use does not depend on
+corpus size (apart from the source-to-new document id map kept on import).
+Imported vectors are stored on the chunks as-is; RAGService builds its FAISS
+index from them when it loads, so nothing is re-embedded. Chunks without a
+vector are exported as zeros with ``has_vector: false``; a vector of any other
+dimension stops the export rather than being dropped.
+"""
+from typing import Dict, Iterator, List, Optional
+import json
+import logging
+import os
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session, undefer
+from ..config import settings
+from ..models import Document, DocumentChunk
+
+FORMAT_VERSION = 1
+BATCH_SIZE = 1000
+VECTOR_DTYPE = np.dtype("<f4")
+
+logger = logging.getLogger(__name__)
+
+
+def export_corpus(db: Session, owner_id: int, output_dir: str, dimension: Optional[int] = None) -> Dict[str, int]:
+    """Write every document and chunk owned by ``owner_id`` to ``output_dir``.
+
+    ``dimension`` defaults to the configured embedding model's.
+    """
+    if dimension is None:
+        from .embeddings import get_embedding_model
+        dimension = get_embedding_model().get_sentence_embedding_dimension()
+    row_bytes = dimension * VECTOR_DTYPE.itemsize
+    os.makedirs(output_dir, exist_ok=True)
+    documents = chunks = 0
+
+    with open(os.path.join(output_dir, "documents.ndjson"), "w", encoding="utf-8") as out:
+        statement = (
+            select(Document)
+            .options(undefer(Document.content))
+            .where(Document.owner_id == owner_id)
+            .order_by(Document.id)
+            .execution_options(yield_per=100)
+        )
+        for document in db.execute(statement).scalars():
+            out.write(json.dumps({
+                "id": document.id,
+                "title": document.title,
+                "mime_type": document.mime_type,
+                "google_file_id": document.google_file_id,
+                "content": document.content
+            }) + "\n")
+            documents += 1
+            db.expunge(document)
+
+    zeros = np.zeros(dimension, dtype=VECTOR_DTYPE).tobytes()
+    with open(os.path.join(output_dir, "chunks.ndjson"), "w", encoding="utf-8") as out, \
+            open(os.path.join(output_dir, "vectors.f32"), "wb") as vectors:
+        statement = (
+            select(
+                DocumentChunk.id,
+                DocumentChunk.document_id,
+                DocumentChunk.chunk_index,
+                DocumentChunk.content,
+                DocumentChunk.embedding
+            )
+            .join(Document, Document.id == DocumentChunk.document_id)
+            .where(Document.owner_id == owner_id)
+            .order_by(DocumentChunk.document_id, DocumentChunk.chunk_index)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        for row in db.execute(statement):
+            has_vector = row.embedding is not None
+            if has_vector and len(row.embedding) != row_bytes:
+                raise ValueError(
+                    f"Chunk {row.id} has a {len(row.embedding) // VECTOR_DTYPE.itemsize}-dimensional vector, "
+                    f"expected {dimension}; export with the matching dimension"
+                )
+            out.write(json.dumps({
+                "document_id": row.document_id,
+                "chunk_index": row.chunk_index,
+                "content": row.content,
+                "has_vector": has_vector
+            }) + "\n")
+            vectors.write(row.embedding if has_vector else zeros)
+            chunks += 1
+
+    with open(os.path.join(output_dir, "manifest.json"), "w") as out:
+        json.dump({
+            "format": FORMAT_VERSION,
+            "model": settings.embedding_model,
+            "dimension": dimension,
+            "dtype": "float32",
+            "documents": documents,
+            "chunks": chunks
+        }, out, indent=2)
+
+    return {"documents": documents, "chunks": chunks}
+
+
+def _read_ndjson_batches(path: str) -> Iterator[List[dict]]:
+    batch = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) == BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _check_owner_conflicts(db: Session, input_dir: str, owner_id: int):
+    """Refuse the import if any of its Drive files already belongs to another user."""
+    for batch in _read_ndjson_batches(os.path.join(input_dir, "documents.ndjson")):
+        file_ids = [doc["google_file_id"] for doc in batch if doc["google_file_id"]]
+        if not file_ids:
+            continue
+        conflict = db.execute(
+            select(Document.google_file_id, Document.owner_id)
+            .where(Document.google_file_id.in_(file_ids), Document.owner_id != owner_id)
+            .limit(1)
+        ).first()
+        if conflict is not None:
+            raise ValueError(
+                f"Document with google_file_id {conflict.google_file_id} already belongs to user "
+                f"{conflict.owner_id}; refusing to import it for user {owner_id}"
+            )
+
+
+def _import_documents(db: Session, input_dir: str, owner_id: int) -> Dict[int, int]:
+    """Insert or update documents and return the source id -> new id map."""
+    id_map: Dict[int, int] = {}
+    for batch in _read_ndjson_batches(os.path.join(input_dir, "documents.ndjson")):
+        file_ids = [doc["google_file_id"] for doc in batch if doc["google_file_id"]]
+        existing = {
+            document.google_file_id: document
+            for document in db.execute(
+                select(Document).where(Document.google_file_id.in_(file_ids), Document.owner_id == owner_id)
+            ).scalars()
+        } if file_ids else {}
+
+        new_rows = []
+        for doc in batch:
+            current = existing.get(doc["google_file_id"]) if doc["google_file_id"] else None
+            if current is not None:
+                # Already present: take the imported version and drop its old chunks
+                current.title = doc["title"]
+                current.mime_type = doc["mime_type"]
+                current.content = doc["content"]
+                db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == current.id))
+                id_map[doc["id"]] = current.id
+            else:
+                new_rows.append(doc)
+
+        if new_rows:
+            new_ids = db.execute(
+                insert(Document).returning(Document.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "title": doc["title"],
+                        "mime_type": doc["mime_type"],
+                        "google_file_id": doc["google_file_id"],
+                        "content": doc["content"],
+                        "owner_id": owner_id
+                    }
+                    for doc in new_rows
+                ]
+            ).scalars().all()
+            id_map.update({doc["id"]: new_id for doc, new_id in zip(new_rows, new_ids)})
+        db.commit()
+        db.expunge_all()
+    return id_map
+
+
+def import_corpus(db: Session, input_dir: str, owner_id: int) -> Dict[str, int]:
+    """Load an export into the database for ``owner_id``."""
+    with open(os.path.join(input_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported export format: {manifest.get('format')}")
+    if manifest.get("model") != settings.embedding_model:
+        logger.warning("Export was embedded with %s, current model is %s",
+                       manifest.get("model"), settings.embedding_model)
+    dimension = manifest["dimension"]
+    row_bytes = dimension * VECTOR_DTYPE.itemsize
+
+    # Checked up front, since documents are committed batch by batch
+    _check_owner_conflicts(db, input_dir, owner_id)
+    id_map = _import_documents(db, input_dir, owner_id)
+
+    chunks = 0
+    with open(os.path.join(input_dir, "vectors.f32"), "rb") as vectors:
+        for batch in _read_ndjson_batches(os.path.join(input_dir, "chunks.ndjson")):
+            block = np.frombuffer(vectors.read(row_bytes * len(batch)), dtype=VECTOR_DTYPE)
+            if block.size != dimension * len(batch):
+                raise ValueError("vectors.f32 is shorter than chunks.ndjson")
+            block = block.reshape(len(batch), dimension)
+
+            db.execute(
+                insert(DocumentChunk),
+                [
+                    {
+                        "document_id": id_map[chunk["document_id"]],
+                        "chunk_index": chunk["chunk_index"],
+                        "content": chunk["content"],
+                        "embedding": vector.tobytes() if chunk["has_vector"] else None
+                    }
+                    for chunk, vector in zip(batch, block)
+                ]
+            )
+            db.commit()
+            chunks += len(batch)
+
+    return {"documents": len(id_map), "chunks": chunks}
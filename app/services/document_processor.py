@@ -1,165 +1,108 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Tuple
 import PyPDF2
+import codecs
 import io
+import logging
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sqlalchemy.orm import Session
-from ..models import Document, DocumentChunk, DocumentEmbedding
+from ..models import Document
 from ..config import settings
+from ..crud import replace_document_chunks
+from ..metrics import INGEST_STAGE_SECONDS, INGESTED_ITEMS, span
+from .chunker import TextChunker
+from .embedding_batcher import EmbeddingStats, embed_grouped
+from .embeddings import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_BYTES = 1024 * 1024
 
 class DocumentProcessor:
     def __init__(self, db: Session):
         """Initialize the document processor with database session."""
-        print("Initializing DocumentProcessor...")
+        logger.info("Initializing DocumentProcessor")
         self.db = db
         try:
-            print("Loading sentence transformer model...")
-            self.model = SentenceTransformer(settings.embedding_model)
-            print("Model loaded successfully.")
+            self.model = get_embedding_model()
         except Exception as e:
-            print(f"Error loading model: {str(e)}")
+            logger.error("Error loading model: %s", e)
             raise
-        self.chunk_size = 500  # characters per chunk
-        self.chunk_overlap = 50  # characters of overlap between chunks
+        # Leave room for the [CLS]/[SEP] tokens the model adds to every input
+        max_tokens = min(settings.chunk_max_tokens, self.model.max_seq_length - 2)
+        self.chunker = TextChunker(
+            max_tokens=max_tokens,
+            overlap_tokens=min(settings.chunk_overlap_tokens, max_tokens - 1),
+            token_counter=self._count_tokens
+        )
+
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens with the embedding model's own tokenizer."""
+        return len(self.model.tokenizer.tokenize(text))
 
     def process_document(self, document: Document):
         """Process a document by creating chunks and embeddings."""
+        return self.process_documents([(document.id, document.content)])
+
+    def process_documents(self, documents: List[Tuple[int, str]]) -> EmbeddingStats:
+        """Chunk and embed many ``(document_id, text)`` pairs together, then store each document's chunks."""
         try:
-            print(f"\nProcessing document: {document.title}")
-            print(f"Document content length: {len(document.content) if document.content else 0} characters")
-            
-            if not document.content or not document.content.strip():
-                print("Warning: Document has no content")
-                return
-
-            print("Creating chunks...")
-            chunks = self._create_chunks(document.content)
-            if not chunks:
-                print("Warning: No chunks were created from the document")
-                return
-            print(f"Created {len(chunks)} chunks")
-
-            print("\nGenerating embeddings...")
+            chunks_by_document: Dict[int, List[str]] = {}
+            with span(INGEST_STAGE_SECONDS, stage="chunk"):
+                for document_id, content in documents:
+                    if not content or not content.strip():
+                        logger.warning("Document %s has no content", document_id)
+                        continue
+
+                    chunks = self._create_chunks(content)
+                    if not chunks:
+                        logger.warning("No chunks were created from document %s", document_id)
+                        continue
+                    logger.debug("Created %d chunks from document %s (%d characters)",
+                                 len(chunks), document_id, len(content))
+                    chunks_by_document[document_id] = chunks
+
             try:
-                embeddings = self.model.encode(chunks, show_progress_bar=True)
-                print(f"Generated {len(embeddings)} embeddings")
+                with span(INGEST_STAGE_SECONDS, stage="embed"):
+                    embeddings, stats = embed_grouped(self.model, chunks_by_document, settings.embedding_batch_size)
+                logger.info("Generated %d embeddings in %d batches (%.1f embeddings/s)",
+                            stats.texts, stats.batches, stats.embeddings_per_second)
             except Exception as e:
-                print(f"Error generating embeddings: {str(e)}")
+                logger.error("Error generating embeddings: %s", e)
                 raise
 
-            print("\nStoring embeddings in database...")
-            try:
-                # Delete existing embeddings for this document
-                self.db.query(DocumentChunk).filter(DocumentChunk.document_id == document.id).delete()
-                print("Deleted existing chunks")
-
-                # Create new embeddings
-                for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                    print(f"Storing chunk {i+1}/{len(chunks)} (length: {len(chunk)} chars)")
-                    chunk_obj = DocumentChunk(
-                        content=chunk,
-                        embedding=embedding.astype(np.float32).tobytes(),
-                        document_id=document.id,
-                        chunk_index=i
-                    )
-                    self.db.add(chunk_obj)
-                    
-                    # Commit every 10 chunks to avoid memory issues
-                    if (i + 1) % 10 == 0:
-                        self.db.commit()
-                        print(f"Committed chunks {i-8}-{i+1}")
-
-                self.db.commit()
-                print(f"Successfully processed document: {document.title}")
+            with span(INGEST_STAGE_SECONDS, stage="persist"):
+                for document_id, chunks in chunks_by_document.items():
+                    try:
+                        # Old chunks are deleted and new ones inserted in the same transaction
+                        stored = replace_document_chunks(self.db, document_id, chunks, embeddings[document_id])
+                        logger.debug("Stored %d chunks for document %s", stored, document_id)
+                    except Exception as e:
+                        logger.error("Error storing embeddings in database: %s", e)
+                        raise
 
-            except Exception as e:
-                print(f"Error storing embeddings in database: {str(e)}")
-                self.db.rollback()
-                raise
+            INGESTED_ITEMS.inc(len(chunks_by_document), kind="documents")
+            INGESTED_ITEMS.inc(stats.texts, kind="chunks")
+            return stats
 
         except Exception as e:
-            print(f"Error processing document: {str(e)}")
+            logger.error("Error processing document: %s", e)
             self.db.rollback()
             raise
 
-    def _create_chunks(self, text: str, chunk_size: int = 500, overlap: int = 100) -> List[str]:
-        """Split text into overlapping chunks."""
-        try:
-            print("Starting text chunking...")
-            if not text or not text.strip():
-                print("Warning: Empty text received")
-                return []
-
-            chunks = []
-            start = 0
-            text_length = len(text)
-            print(f"Text length: {text_length} characters")
-
-            while start < text_length:
-                # Print progress every few chunks
-                if len(chunks) % 5 == 0:
-                    print(f"Chunking progress: {start}/{text_length} characters processed")
-
-                end = min(start + chunk_size, text_length)
-                chunk = text[start:end]
-
-                # If this is not the first chunk and we have overlap available
-                if start > 0 and start >= overlap:
-                    # Look for sentence boundaries in the overlap region
-                    overlap_text = text[start - overlap:start]
-                    best_boundary = -1
-                    
-                    for punct in ['. ', '! ', '? ', '\n\n']:
-                        boundary = overlap_text.rfind(punct)
-                        if boundary != -1 and boundary > best_boundary:
-                            best_boundary = boundary
-                    
-                    if best_boundary != -1:
-                        start = start - overlap + best_boundary + 2  # +2 for the punctuation mark and space
-                        chunk = text[start:end]
-
-                # If this is not the last chunk, try to end at a sentence boundary
-                if end < text_length:
-                    best_boundary = -1
-                    for punct in ['. ', '! ', '? ', '\n\n']:
-                        boundary = chunk.rfind(punct)
-                        if boundary != -1 and boundary > best_boundary:
-                            best_boundary = boundary
-                    
-                    if best_boundary != -1:
-                        chunk = chunk[:best_boundary + 2]  # +2 for the punctuation mark and space
-
-                # Only add non-empty chunks
-                chunk = chunk.strip()
-                if chunk:
-                    chunks.append(chunk)
-                    print(f"Created chunk {len(chunks)}: {len(chunk)} characters")
-
-                # Move to next chunk, ensure we make progress
-                new_start = start + len(chunk)
-                if new_start <= start:  # Ensure we always make progress
-                    new_start = start + chunk_size // 2
-                start = new_start
-
-                # Safety check to prevent infinite loops
-                if len(chunks) > text_length // 50:  # Assuming average chunk size of 50 characters
-                    print("Warning: Too many chunks created, breaking to prevent infinite loop")
-                    break
-
-            print(f"Chunking completed. Created {len(chunks)} chunks.")
-            return chunks
-
-        except Exception as e:
-            print(f"Error creating chunks: {str(e)}")
-            raise
+    def _create_chunks(self, text: str) -> List[str]:
+        """Split text into overlapping, token-bounded chunks."""
+        if not text or not text.strip():
+            logger.debug("Empty text received")
+            return []
+        return self.chunker.split(text)
 
     def process_text(self, text: str, document_id: int) -> List[Dict[str, Any]]:
         """Process a text string and return chunks with their embeddings."""
         chunks = self._create_chunks(text)
+        embeddings = self.model.encode(chunks, batch_size=settings.embedding_batch_size) if chunks else []
         processed_chunks = []
-        
-        for idx, chunk_text in enumerate(chunks):
-            embedding = self.model.encode(chunk_text)
+
+        for idx, (chunk_text, embedding) in enumerate(zip(chunks, embeddings)):
             processed_chunks.append({
                 "text": chunk_text,
                 "embedding": embedding,
@@ -171,18 +114,23 @@ class DocumentProcessor:
 
     def process_pdf(self, pdf_content: bytes) -> str:
         """Extract text from PDF content."""
-        pdf_file = io.BytesIO(pdf_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ''
-        
-        for page in pdf_reader.pages:
-            text += page.extract_text() + '\n'
-            
-        return text
+        return self.extract_text(io.BytesIO(pdf_content), 'application/pdf')
+
+    def extract_text(self, file_obj: BinaryIO, mime_type: str) -> str:
+        """Extract text from a binary file object, reading it as a stream."""
+        if mime_type == 'application/pdf':
+            pdf_reader = PyPDF2.PdfReader(file_obj)
+            return ''.join((page.extract_text() or '') + '\n' for page in pdf_reader.pages)
+
+        # Decode block by block; works on any file-like object, including spooled temp files
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        parts = [decoder.decode(block) for block in iter(lambda: file_obj.read(READ_BLOCK_BYTES), b'')]
+        parts.append(decoder.decode(b'', final=True))
+        return ''.join(parts)
 
     def generate_embeddings(self, chunks: List[str]) -> List[np.ndarray]:
         """Generate embeddings for text chunks."""
-        return self.model.encode(chunks, convert_to_tensor=True).numpy()
+        return self.model.encode(chunks, batch_size=settings.embedding_batch_size, convert_to_numpy=True)
 
     def process_document_content(self, content: bytes, mime_type: str) -> tuple[str, List[Dict[str, Any]]]:
         """Process document content and generate embeddings."""
@@ -204,7 +152,7 @@ class DocumentProcessor:
             chunk_embeddings.append({
                 'chunk_index': i,
                 'chunk_text': chunk,
-                'embedding_vector': embedding.tolist()
+                'embedding': embedding.astype(np.float32).tobytes()
             })
             
         return text, chunk_embeddings 
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Local catalog of Google Drive file metadata.
+
+The first refresh for a user lists the whole drive and records the position of
+the Drive changes feed; later refreshes only apply the changes since then. The
+catalog is what ``/auth/google/files`` and document sync read from, so neither
+has to page through the drive on every call.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from ..models import DriveFile, User
+from .google_drive import GoogleDriveService
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(DriveFile)
+
+
+def _upsert_files(db: Session, owner_id: int, files: List[Dict[str, Any]], synced_at: datetime):
+    if not files:
+        return
+    statement = _insert(db)
+    statement = statement.on_conflict_do_update(
+        index_elements=[DriveFile.owner_id, DriveFile.file_id],
+        set_={
+            "name": statement.excluded.name,
+            "mime_type": statement.excluded.mime_type,
+            "created_time": statement.excluded.created_time,
+            "modified_time": statement.excluded.modified_time,
+            "synced_at": statement.excluded.synced_at
+        }
+    )
+    db.execute(statement, [
+        {
+            "owner_id": owner_id,
+            "file_id": file["id"],
+            "name": file.get("name"),
+            "mime_type": file.get("mimeType"),
+            "created_time": file.get("createdTime"),
+            "modified_time": file.get("modifiedTime"),
+            "synced_at": synced_at
+        }
+        for file in files
+    ])
+
+
+def _delete_files(db: Session, owner_id: int, file_ids: List[str]):
+    if file_ids:
+        db.execute(delete(DriveFile).where(DriveFile.owner_id == owner_id, DriveFile.file_id.in_(file_ids)))
+
+
+def _full_listing(db: Session, user: User, drive_service: GoogleDriveService) -> Dict[str, int]:
+    # Take the feed position first so changes made during the listing are replayed next time
+    start_token = drive_service.get_start_page_token()
+    started = datetime.now(timezone.utc)
+    upserted = 0
+    for files in drive_service.iter_file_pages():
+        _upsert_files(db, user.id, files, started)
+        db.commit()
+        upserted += len(files)
+
+    # Anything not seen by this listing is gone from the drive
+    removed = db.execute(
+        delete(DriveFile).where(DriveFile.owner_id == user.id, DriveFile.synced_at < started)
+    ).rowcount
+    user.drive_changes_token = start_token
+    db.commit()
+    return {"upserted": upserted, "removed": removed}
+
+
+def _apply_changes(db: Session, user: User, drive_service: GoogleDriveService) -> Dict[str, int]:
+    upserted = removed = 0
+    for changes, new_start_token in drive_service.iter_changes(user.drive_changes_token):
+        now = datetime.now(timezone.utc)
+        changed, gone = [], []
+        for change in changes:
+            file = change.get("file")
+            if change.get("removed") or not file or file.get("trashed"):
+                gone.append(change["fileId"])
+            else:
+                changed.append(file)
+        _delete_files(db, user.id, gone)
+        _upsert_files(db, user.id, changed, now)
+        if new_start_token:
+            user.drive_changes_token = new_start_token
+        db.commit()
+        upserted += len(changed)
+        removed += len(gone)
+    return {"upserted": upserted, "removed": removed}
+
+
+def refresh_catalog(db: Session, user: User, drive_service: GoogleDriveService) -> Dict[str, int]:
+    """Bring the user's catalog up to date and return upserted/removed counts."""
+    try:
+        if user.drive_changes_token is None:
+            return _full_listing(db, user, drive_service)
+        return _apply_changes(db, user, drive_service)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def catalog_page_statement(
+    owner_id: int,
+    after: Optional[int] = None,
+    limit: int = 100,
+    mime_types: Optional[List[str]] = None
+) -> Select:
+    """Select one keyset page of catalog rows, fetching one extra row to detect a next page."""
+    statement = select(
+        DriveFile.id,
+        DriveFile.file_id,
+        DriveFile.name,
+        DriveFile.mime_type,
+        DriveFile.created_time,
+        DriveFile.modified_time
+    ).where(DriveFile.owner_id == owner_id)
+    if mime_types:
+        statement = statement.where(DriveFile.mime_type.in_(mime_types))
+    if after is not None:
+        statement = statement.where(DriveFile.id > after)
+    return statement.order_by(DriveFile.id).limit(limit + 1)
+
+
+def catalog_row_to_file(row) -> Dict[str, Any]:
+    """Shape a catalog row like a Drive API file resource."""
+    return {
+        "id": row.file_id,
+        "name": row.name,
+        "mimeType": row.mime_type,
+        "createdTime": row.created_time,
+        "modifiedTime": row.modified_time
+    }
+
+
+def list_catalog_files(db: Session, owner_id: int, mime_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Return every catalogued file for ``owner_id`` in Drive API shape."""
+    statement = catalog_page_statement(owner_id, mime_types=mime_types).limit(None)
+    return [catalog_row_to_file(row) for row in db.execute(statement)]
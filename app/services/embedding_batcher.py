@@ -0,0 +1,56 @@
+from typing import Dict, Hashable, List, NamedTuple, Tuple
+import time
+import numpy as np
+
+
+class EmbeddingStats(NamedTuple):
+    texts: int
+    batches: int
+    seconds: float
+
+    @property
+    def embeddings_per_second(self) -> float:
+        return self.texts / self.seconds if self.seconds > 0 else 0.0
+
+
+def embed_grouped(
+    model,
+    groups: Dict[Hashable, List[str]],
+    batch_size: int = 256
+) -> Tuple[Dict[Hashable, np.ndarray], EmbeddingStats]:
+    """Embed the texts of many groups (e.g. documents) together.
+
+    All texts are pooled and sorted by length so each fixed-size batch holds
+    inputs of similar length and little padding is wasted. The embeddings are
+    scattered back into their original order and returned per group as
+    float32 arrays.
+    """
+    texts: List[str] = []
+    offsets: Dict[Hashable, Tuple[int, int]] = {}
+    for key, group_texts in groups.items():
+        offsets[key] = (len(texts), len(texts) + len(group_texts))
+        texts.extend(group_texts)
+
+    if not texts:
+        return {key: np.empty((0, 0), dtype=np.float32) for key in groups}, EmbeddingStats(0, 0, 0.0)
+
+    order = np.argsort([len(text) for text in texts], kind="stable")
+    output = None
+    batches = 0
+    start = time.perf_counter()
+    for batch_start in range(0, len(order), batch_size):
+        indices = order[batch_start:batch_start + batch_size]
+        embeddings = model.encode(
+            [texts[i] for i in indices],
+            batch_size=len(indices),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        if output is None:
+            output = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+        output[indices] = embeddings
+        batches += 1
+    seconds = time.perf_counter() - start
+
+    results = {key: output[begin:end] for key, (begin, end) in offsets.items()}
+    return results, EmbeddingStats(len(texts), batches, seconds)
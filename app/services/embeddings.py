@@ -0,0 +1,143 @@
+from functools import lru_cache
+from typing import List, Optional, Union
+import json
+import logging
+import os
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from ..config import settings
+
+BACKENDS = ("sentence-transformers", "onnx", "onnx-int8")
+ONNX_MODEL_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+ONNX_CONFIG_FILE = "embedding_config.json"
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxEmbeddingBackend:
+    """CPU embedding with ONNX Runtime, matching SentenceTransformer.encode.
+
+    Exposes the parts of the SentenceTransformer API the services rely on
+    (``encode``, ``tokenizer``, ``max_seq_length`` and
+    ``get_sentence_embedding_dimension``), so it can be used in its place.
+    """
+
+    def __init__(self, model_dir: str, model_file: str = "model.onnx", threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, ONNX_CONFIG_FILE)) as f:
+            config = json.load(f)
+        self.max_seq_length = config["max_seq_length"]
+        self.dimension = config["dimension"]
+        self.normalize = config["normalize"]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+        **kwargs
+    ) -> np.ndarray:
+        """Embed sentences with mean pooling (and normalisation if the model uses it)."""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        output = np.empty((len(sentences), self.dimension), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            encoded = self.tokenizer(
+                batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            output[start:start + len(batch)] = pooled
+
+        return output[0] if single else output
+
+
+def get_embedding_model(backend: Optional[str] = None):
+    """Return the process-wide embedding model for ``backend``, loading it on first use."""
+    return _load_embedding_model(backend or settings.embedding_backend)
+
+
+@lru_cache(maxsize=None)
+def _load_embedding_model(backend: str):
+    # Keyed on the resolved name, so the default and the explicitly named backend share one model
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of: {', '.join(BACKENDS)}")
+
+    if backend == "sentence-transformers":
+        logger.info("Loading sentence transformer model %s", settings.embedding_model)
+        if settings.embedding_threads:
+            import torch
+            torch.set_num_threads(settings.embedding_threads)
+        return SentenceTransformer(settings.embedding_model)
+
+    logger.info("Loading %s model from %s", backend, settings.onnx_model_dir)
+    return OnnxEmbeddingBackend(settings.onnx_model_dir, ONNX_MODEL_FILES[backend], settings.embedding_threads)
+
+
+def export_onnx_model(output_dir: str, model_name: Optional[str] = None, quantize: bool = True):
+    """Export the SentenceTransformer to ONNX, plus a dynamically int8-quantized copy."""
+    import torch
+    from sentence_transformers.models import Normalize
+
+    model_name = model_name or settings.embedding_model
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model
+    transformer.config.return_dict = False
+    transformer.eval()
+
+    os.makedirs(output_dir, exist_ok=True)
+    model.tokenizer.save_pretrained(output_dir)
+
+    dummy = model.tokenizer(["export the embedding model"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILES["onnx"])
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    print(f"Exported ONNX model to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantized_path = os.path.join(output_dir, ONNX_MODEL_FILES["onnx-int8"])
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print(f"Exported int8-quantized model to {quantized_path}")
+
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), "w") as f:
+        json.dump({
+            "model": model_name,
+            "max_seq_length": model.max_seq_length,
+            "dimension": model.get_sentence_embedding_dimension(),
+            "normalize": any(isinstance(module, Normalize) for module in model)
+        }, f, indent=2)
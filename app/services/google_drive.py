@@ -1,12 +1,26 @@
+from google.auth.transport.requests import Request as GoogleAuthRequest
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.http import MediaIoBaseDownload
-import io
+from collections import OrderedDict
+import httplib2
 import json
-from typing import List, Dict, Any, Tuple
-from datetime import datetime
+import logging
+import tempfile
+import threading
+from typing import BinaryIO, Iterator, List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from ..config import settings
+from ..metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE_FIELDS = 'id, name, mimeType, createdTime, modifiedTime, trashed'
+# Just what ingestion needs from a listing
+LISTING_FILE_FIELDS = 'id, name, mimeType, modifiedTime'
 
 SCOPES = [
     'https://www.googleapis.com/auth/drive.readonly',
@@ -16,23 +30,118 @@ SCOPES = [
     'https://www.googleapis.com/auth/userinfo.profile'
 ]
 
+_discovery_document = None
+_discovery_lock = threading.Lock()
+# httplib2 connections are not thread-safe, so each thread keeps its own clients
+_client_cache = threading.local()
+
+def _get_discovery_document() -> Dict[str, Any]:
+    """Parse the Drive v3 discovery document shipped with the client library, once per process."""
+    global _discovery_document
+    if _discovery_document is None:
+        with _discovery_lock:
+            if _discovery_document is None:
+                _discovery_document = json.loads(get_static_doc('drive', 'v3'))
+    return _discovery_document
+
+def _parse_expiry(value: Optional[str]) -> Optional[datetime]:
+    """google-auth expects a naive UTC datetime."""
+    if not value:
+        return None
+    expiry = datetime.fromisoformat(value)
+    if expiry.tzinfo is not None:
+        expiry = expiry.astimezone(timezone.utc).replace(tzinfo=None)
+    return expiry
+
+def credentials_to_dict(credentials: Credentials) -> Dict[str, Any]:
+    """Serialize credentials in the shape stored in User.google_credentials."""
+    return {
+        'token': credentials.token,
+        'refresh_token': credentials.refresh_token,
+        'token_uri': credentials.token_uri,
+        'client_id': credentials.client_id,
+        'client_secret': credentials.client_secret,
+        'scopes': list(credentials.scopes) if credentials.scopes else None,
+        'expiry': credentials.expiry.isoformat() if credentials.expiry else None
+    }
+
 class GoogleDriveService:
-    def __init__(self, credentials_dict: Dict[str, Any]):
+    def __init__(self, credentials_dict: Dict[str, Any], user_id: Optional[int] = None):
         """Initialize the Google Drive service with credentials."""
+        self.user_id = user_id
+        self.refresh_token = credentials_dict.get('refresh_token')
         try:
-            credentials = Credentials(
+            self.credentials = Credentials(
                 token=credentials_dict.get('token'),
                 refresh_token=credentials_dict.get('refresh_token'),
                 token_uri=credentials_dict.get('token_uri'),
                 client_id=credentials_dict.get('client_id'),
                 client_secret=credentials_dict.get('client_secret'),
-                scopes=credentials_dict.get('scopes')
+                scopes=credentials_dict.get('scopes'),
+                expiry=_parse_expiry(credentials_dict.get('expiry'))
             )
-            self.service = build('drive', 'v3', credentials=credentials)
+            self._stored_token = self.credentials.token
+            # One persistent HTTP connection pool per client, reused across calls
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=settings.google_http_timeout_seconds))
+            self.service = build_from_document(_get_discovery_document(), http=http)
         except Exception as e:
-            print(f"Error initializing Google Drive service: {str(e)}")
+            logger.error("Error initializing Google Drive service: %s", e)
             self.service = None
 
+    @classmethod
+    def for_user(cls, user_id: int, credentials_dict: Dict[str, Any]) -> "GoogleDriveService":
+        """Return this thread's cached client for ``user_id``, building it if needed.
+
+        A client is rebuilt when the user re-authorizes (new refresh token).
+        """
+        clients = getattr(_client_cache, 'clients', None)
+        if clients is None:
+            clients = _client_cache.clients = OrderedDict()
+
+        client = clients.get(user_id)
+        if client is None or client.service is None or client.refresh_token != credentials_dict.get('refresh_token'):
+            CACHE_REQUESTS.inc(cache="drive_client", result="miss")
+            client = cls(credentials_dict, user_id=user_id)
+            clients[user_id] = client
+            while len(clients) > settings.drive_client_cache_size:
+                clients.popitem(last=False)
+        else:
+            CACHE_REQUESTS.inc(cache="drive_client", result="hit")
+            clients.move_to_end(user_id)
+        client.ensure_fresh_credentials()
+        return client
+
+    def ensure_fresh_credentials(self):
+        """Refresh the access token shortly before it expires, and store any new token."""
+        if not self.service:
+            return
+        credentials = self.credentials
+        margin = timedelta(seconds=settings.google_token_refresh_margin_seconds)
+        expiring = credentials.expiry is not None and credentials.expiry - datetime.utcnow() < margin
+        if credentials.refresh_token and (not credentials.token or expiring):
+            try:
+                credentials.refresh(GoogleAuthRequest())
+            except Exception as e:
+                logger.error("Error refreshing Google credentials: %s", e)
+                return
+        # Also catches tokens refreshed reactively by AuthorizedHttp after a 401
+        if credentials.token != self._stored_token:
+            self._store_credentials()
+
+    def _store_credentials(self):
+        if self.user_id is None:
+            return
+        from ..crud import update_user_credentials
+        from ..database import SessionLocal
+        db = SessionLocal()
+        try:
+            update_user_credentials(db, self.user_id, credentials_to_dict(self.credentials))
+            self._stored_token = self.credentials.token
+        except Exception as e:
+            logger.error("Error storing refreshed Google credentials: %s", e)
+        finally:
+            db.close()
+
     @staticmethod
     def get_oauth_flow():
         client_config = {
@@ -56,6 +165,7 @@ class GoogleDriveService:
         """List files from Google Drive with optional MIME type filtering."""
         if not self.service:
             raise ValueError("Service not initialized. Please authenticate first.")
+        self.ensure_fresh_credentials()
 
         try:
             # Prepare the query for MIME types
@@ -75,7 +185,8 @@ class GoogleDriveService:
                 params = {
                     'q': query,
                     'spaces': 'drive',
-                    'fields': 'nextPageToken, files(id, name, mimeType, createdTime, modifiedTime)',
+                    'pageSize': 1000,
+                    'fields': f'nextPageToken, files({LISTING_FILE_FIELDS})',
                     'pageToken': page_token
                 }
                 
@@ -91,65 +202,122 @@ class GoogleDriveService:
             return results
 
         except Exception as e:
-            print(f"Error listing files: {str(e)}")
+            logger.error("Error listing files: %s", e)
             return []
 
-    def download_file(self, file_id: str) -> Tuple[str, Dict[str, Any]]:
-        """Download a file's content from Google Drive."""
+    def iter_file_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yield every non-trashed file in the drive, one API page at a time."""
+        if not self.service:
+            raise ValueError("Service not initialized. Please authenticate first.")
+        self.ensure_fresh_credentials()
+
+        page_token = None
+        while True:
+            response = self.service.files().list(
+                q="trashed = false",
+                spaces='drive',
+                pageSize=1000,
+                fields=f'nextPageToken, files({CATALOG_FILE_FIELDS})',
+                pageToken=page_token
+            ).execute()
+            yield response.get('files', [])
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+    def get_start_page_token(self) -> str:
+        """Return the current position of the drive's changes feed."""
         if not self.service:
             raise ValueError("Service not initialized. Please authenticate first.")
+        self.ensure_fresh_credentials()
+        return self.service.changes().getStartPageToken().execute()['startPageToken']
+
+    def iter_changes(self, page_token: str) -> Iterator[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """Yield ``(changes, new_start_page_token)`` pages from ``page_token`` onwards.
+
+        ``new_start_page_token`` is only set on the last page.
+        """
+        if not self.service:
+            raise ValueError("Service not initialized. Please authenticate first.")
+        self.ensure_fresh_credentials()
+
+        while page_token:
+            response = self.service.changes().list(
+                pageToken=page_token,
+                spaces='drive',
+                pageSize=1000,
+                includeRemoved=True,
+                fields=f'nextPageToken, newStartPageToken, changes(fileId, removed, file({CATALOG_FILE_FIELDS}))'
+            ).execute()
+            page_token = response.get('nextPageToken')
+            yield response.get('changes', []), response.get('newStartPageToken')
+
+    def download_to_file(
+        self,
+        file_id: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[BinaryIO], Optional[Dict[str, Any]]]:
+        """Download a file into a temp file that spills to disk past ``drive_spool_max_bytes``.
+
+        Google Docs are exported as plain text. Returns ``(file_obj, metadata)`` with
+        the file object rewound; the caller closes it. Pass the file's listing entry
+        as ``metadata`` to skip the metadata lookup.
+        """
+        if not self.service:
+            raise ValueError("Service not initialized. Please authenticate first.")
+        self.ensure_fresh_credentials()
 
         try:
-            # Get file metadata
-            print(f"Getting metadata for file {file_id}...")
-            file = self.service.files().get(fileId=file_id, fields='id, name, mimeType').execute()
+            if metadata and metadata.get('mimeType'):
+                file = metadata
+            else:
+                logger.debug("Getting metadata for file %s", file_id)
+                file = self.service.files().get(fileId=file_id, fields='id, name, mimeType').execute()
             mime_type = file.get('mimeType', '')
-            print(f"File mime type: {mime_type}")
 
-            # Handle Google Docs files
             if mime_type == 'application/vnd.google-apps.document':
-                print("Detected Google Doc, exporting as plain text...")
-                try:
-                    response = self.service.files().export(
-                        fileId=file_id,
-                        mimeType='text/plain'
-                    ).execute()
-                    print("Successfully exported Google Doc")
-                    content = response.decode('utf-8') if isinstance(response, bytes) else response
-                    return content, file
-                except Exception as e:
-                    print(f"Error exporting Google Doc: {str(e)}")
-                    return None, None
-
-            # Handle regular files
-            print("Downloading regular file...")
-            try:
+                request = self.service.files().export_media(fileId=file_id, mimeType='text/plain')
+            else:
                 request = self.service.files().get_media(fileId=file_id)
-                file_content = io.BytesIO()
-                downloader = MediaIoBaseDownload(file_content, request)
+
+            spool = tempfile.SpooledTemporaryFile(max_size=settings.drive_spool_max_bytes)
+            try:
+                # Only one chunk of the file is held in memory at a time
+                downloader = MediaIoBaseDownload(spool, request, chunksize=settings.drive_download_chunk_bytes)
                 done = False
-                
                 while not done:
                     status, done = downloader.next_chunk()
-                    print(f"Download progress: {int(status.progress() * 100)}%")
-                
-                content = file_content.getvalue()
-                if isinstance(content, bytes) and mime_type.startswith('text/'):
-                    content = content.decode('utf-8')
-                print("File download completed")
-                return content, file
-            except Exception as e:
-                print(f"Error downloading file: {str(e)}")
-                return None, None
+                spool.seek(0)
+                return spool, file
+            except Exception:
+                spool.close()
+                raise
 
         except Exception as e:
-            print(f"An error occurred during file download: {str(e)}")
+            logger.error("Error downloading file %s: %s", file_id, e)
             return None, None
 
+    def download_file(self, file_id: str, metadata: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+        """Download a file's content from Google Drive.
+
+        Loads the whole file into memory; use ``download_to_file`` for large files.
+        """
+        file_obj, file = self.download_to_file(file_id, metadata)
+        if file_obj is None:
+            return None, None
+
+        with file_obj:
+            content = file_obj.read()
+        mime_type = file.get('mimeType', '')
+        if mime_type.startswith('text/') or mime_type == 'application/vnd.google-apps.document':
+            content = content.decode('utf-8')
+        return content, file
+
     def get_file_metadata(self, file_id: str) -> Dict[str, Any]:
         """Get file metadata from Google Drive."""
         if not self.service:
             raise ValueError("Service not initialized. Please authenticate first.")
+        self.ensure_fresh_credentials()
 
         try:
             return self.service.files().get(
@@ -157,5 +325,5 @@ class GoogleDriveService:
                 fields='id, name, mimeType, modifiedTime, createdTime, owners'
             ).execute()
         except Exception as e:
-            print(f"An error occurred: {e}")
-            return None 
\ No newline at end of file
+            logger.error("Error getting metadata for file %s: %s", file_id, e)
+            return None
@@ -1,22 +1,32 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import faiss
+import logging
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sqlalchemy.orm import Session
 from openai import OpenAI
 from ..models import Document, DocumentChunk
 from ..config import settings
+from ..metrics import FAISS_INDEX_VECTORS, QA_STAGE_SECONDS, span
+from .embeddings import get_embedding_model
 import os
 
+logger = logging.getLogger(__name__)
+
 class RAGService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, model=None, openai_client=None, index_file: Optional[str] = None):
+        """``model``, ``openai_client`` and ``index_file`` default to the configured ones;
+        benchmarks pass fakes."""
         self.db = db
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.index_file = "./data/faiss_index.bin"
+        self.model = model or get_embedding_model()
+        self.index_file = index_file or settings.faiss_index_path
         self.chunk_ids = []  # Initialize chunk_ids list
         self.load_or_create_index()
-        self.openai_client = OpenAI(api_key=settings.openai_api_key) if settings.openai_api_key else None
-        self._load_chunks_from_db()
+        if openai_client is None and settings.openai_api_key:
+            openai_client = OpenAI(api_key=settings.openai_api_key)
+        self.openai_client = openai_client
+        with span(QA_STAGE_SECONDS, stage="load_index"):
+            self._load_chunks_from_db()
+        FAISS_INDEX_VECTORS.set(self.index.ntotal)
 
     def _load_chunks_from_db(self):
         """Load all document chunks from the database and update the FAISS index."""
@@ -24,7 +34,7 @@ class RAGService:
             # Get all chunks from the database
             chunks = self.db.query(DocumentChunk).all()
             if not chunks:
-                print("No chunks found in database")
+                logger.info("No chunks found in database")
                 # Initialize empty index
                 embedding_size = 384
                 self.index = faiss.IndexFlatL2(embedding_size)
@@ -34,7 +44,7 @@ class RAGService:
             embeddings = []
             self.chunk_ids = []  # Reset chunk_ids list
 
-            print(f"Processing {len(chunks)} chunks from database...")
+            logger.debug("Processing %d chunks from database", len(chunks))
             for chunk in chunks:
                 if chunk.embedding is not None:
                     try:
@@ -44,40 +54,36 @@ class RAGService:
                             embeddings.append(embedding)
                             self.chunk_ids.append(chunk.id)
                         else:
-                            print(f"Warning: Chunk {chunk.id} has wrong embedding dimension: {len(embedding)}")
+                            logger.warning("Chunk %s has wrong embedding dimension: %d", chunk.id, len(embedding))
                     except Exception as e:
-                        print(f"Error processing chunk {chunk.id}: {str(e)}")
+                        logger.error("Error processing chunk %s: %s", chunk.id, e)
                         continue
                 else:
-                    print(f"Warning: Chunk {chunk.id} has no embedding")
+                    logger.debug("Chunk %s has no embedding", chunk.id)
 
             if embeddings:
-                print(f"Found {len(embeddings)} valid embeddings")
                 # Convert list of embeddings to numpy array
                 embeddings_array = np.vstack(embeddings)
-                print(f"Embeddings array shape: {embeddings_array.shape}")
+                logger.debug("Embeddings array shape: %s", embeddings_array.shape)
                 
                 # Create new index with the correct dimension
                 self.index = faiss.IndexFlatL2(embeddings_array.shape[1])
                 
                 # Add embeddings to the index
                 self.index.add(embeddings_array)
-                print(f"Added embeddings to FAISS index. Total vectors: {self.index.ntotal}")
                 
                 # Save the updated index
                 os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
                 faiss.write_index(self.index, self.index_file)
-                print(f"Saved index with {len(embeddings)} chunks")
+                logger.debug("Saved index with %d chunks", len(embeddings))
             else:
-                print("No valid embeddings found in chunks")
+                logger.info("No valid embeddings found in chunks")
                 # Initialize empty index
                 embedding_size = 384
                 self.index = faiss.IndexFlatL2(embedding_size)
 
         except Exception as e:
-            print(f"Error loading chunks from database: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error loading chunks from database: %s", e)
             # Create empty index as fallback
             embedding_size = 384
             self.index = faiss.IndexFlatL2(embedding_size)
@@ -95,7 +101,7 @@ class RAGService:
                 os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
                 faiss.write_index(self.index, self.index_file)
         except Exception as e:
-            print(f"Error loading/creating index: {str(e)}")
+            logger.error("Error loading/creating index: %s", e)
             # Create in-memory index as fallback
             embedding_size = 384
             self.index = faiss.IndexFlatL2(embedding_size)
@@ -104,54 +110,61 @@ class RAGService:
         """Search for similar chunks using the query."""
         try:
             if not self.chunk_ids:  # If no chunks are loaded
-                print("No chunks available for search")
+                logger.info("No chunks available for search")
                 return []
 
-            print(f"\nSearching for query: {query}")
-            print(f"Total chunks available: {len(self.chunk_ids)}")
+            logger.debug("Searching %d chunks for query: %s", len(self.chunk_ids), query)
 
             # Get query embedding
-            query_embedding = self.model.encode([query])[0]
-            
+            with span(QA_STAGE_SECONDS, stage="embed_query"):
+                query_embedding = self.model.encode([query])[0]
+
             # Search in the index
-            D, I = self.index.search(np.array([query_embedding]).astype('float32'), min(k, len(self.chunk_ids)))
-            
-            results = []
-            for idx, (distance, index) in enumerate(zip(D[0], I[0])):
-                if index >= 0 and index < len(self.chunk_ids):  # Add bounds check
-                    chunk_id = self.chunk_ids[index]
-                    chunk = self.db.query(DocumentChunk).filter(DocumentChunk.id == chunk_id).first()
+            with span(QA_STAGE_SECONDS, stage="faiss_search"):
+                D, I = self.index.search(np.array([query_embedding]).astype('float32'), min(k, len(self.chunk_ids)))
+
+            with span(QA_STAGE_SECONDS, stage="hydrate_chunks"):
+                hits = [
+                    (self.chunk_ids[index], distance)
+                    for distance, index in zip(D[0], I[0])
+                    if 0 <= index < len(self.chunk_ids)  # Add bounds check
+                ]
+                chunks = {
+                    chunk.id: chunk
+                    for chunk in self.db.query(DocumentChunk).filter(
+                        DocumentChunk.id.in_([chunk_id for chunk_id, _ in hits])
+                    )
+                }
+
+                results = []
+                for chunk_id, distance in hits:
+                    chunk = chunks.get(chunk_id)
                     if chunk:
                         similarity_score = float(1 / (1 + distance))
-                        print(f"\nFound chunk with similarity score: {similarity_score:.3f}")
-                        print(f"Chunk content preview: {chunk.content[:100]}...")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Found chunk %s with similarity score %.3f: %s...",
+                                         chunk.id, similarity_score, chunk.content[:100])
                         results.append({
                             "content": chunk.content,
                             "document_id": chunk.document_id,
                             "similarity_score": similarity_score
                         })
-            
+
             # Sort results by similarity score
             results.sort(key=lambda x: x["similarity_score"], reverse=True)
             return results
         except Exception as e:
-            print(f"Error searching similar chunks: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error searching similar chunks: %s", e)
             return []
 
     def get_answer(self, question: str) -> str:
         try:
-            # Print available documents first
-            docs = self.db.query(Document).all()
-            print("\nAvailable documents:")
-            for doc in docs:
-                print(f"- {doc.title}: {doc.content[:100]}...")
-
             # Get relevant chunks
             relevant_chunks = self.search_similar_chunks(question, k=3)
             
             if not relevant_chunks:
+                # Titles are only needed for this reply, so the answer path never loads them
+                docs = self.db.query(Document.title).all()
                 return "I couldn't find any relevant information in the documents. Here are the documents I have access to:\n" + \
                        "\n".join([f"- {doc.title}" for doc in docs])
             
@@ -161,23 +174,22 @@ class RAGService:
                        relevant_chunks[0]['content']
             
             # Prepare context from relevant chunks
-            context = "\n\n".join([
-                f"Relevant text (similarity: {chunk['similarity_score']:.2f}):\n{chunk['content']}"
-                for chunk in relevant_chunks
-            ])
+            with span(QA_STAGE_SECONDS, stage="build_prompt"):
+                context = "\n\n".join([
+                    f"Relevant text (similarity: {chunk['similarity_score']:.2f}):\n{chunk['content']}"
+                    for chunk in relevant_chunks
+                ])
             
             if self.openai_client:
                 try:
                     return self._generate_answer_with_chatgpt(question, context)
                 except Exception as e:
-                    print(f"OpenAI API error: {str(e)}")
+                    logger.error("OpenAI API error: %s", e)
                     return f"I found some potentially relevant information, but couldn't generate a proper answer due to an API error. Here's the most relevant content I found:\n\n{relevant_chunks[0]['content']}"
             else:
                 return f"I found some potentially relevant information, but the OpenAI API is not configured. Here's the most relevant content:\n\n{relevant_chunks[0]['content']}"
         except Exception as e:
-            print(f"Error processing question: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error processing question: %s", e)
             return f"Error processing your question: {str(e)}"
 
     def _generate_answer_with_chatgpt(self, question: str, context: str) -> str:
@@ -194,15 +206,16 @@ Question: {question}
 Remember to answer naturally and directly, without mentioning the source of your information."""
 
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that provides natural, conversational responses. Avoid phrases like 'Based on the context' or 'According to the documents'. Instead, answer directly and confidently when you have the information, and simply state when you don't have enough information."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=300
-            )
+            with span(QA_STAGE_SECONDS, stage="llm"):
+                response = self.openai_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that provides natural, conversational responses. Avoid phrases like 'Based on the context' or 'According to the documents'. Instead, answer directly and confidently when you have the information, and simply state when you don't have enough information."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.7,
+                    max_tokens=300
+                )
             return response.choices[0].message.content.strip()
         except Exception as e:
             return f"Error generating answer: {str(e)}" 
\ No newline at end of file
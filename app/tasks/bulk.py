@@ -0,0 +1,51 @@
+from celery import shared_task
+from typing import Optional
+from sqlalchemy import select
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Document
+from .worker import get_document_processor
+
+@shared_task
+def reembed_documents(owner_id: Optional[int] = None):
+    """
+    Re-chunk and re-embed stored documents (all, or one owner's), e.g. after a
+    model or chunking change. Runs on the bulk queue so it never delays syncs.
+    """
+    db = SessionLocal()
+    try:
+        doc_processor = get_document_processor(db)
+        documents = embedded = 0
+        embedding_seconds = 0.0
+        last_id = 0
+        while True:
+            statement = (
+                select(Document.id, Document.content)
+                .where(Document.id > last_id)
+                .order_by(Document.id)
+                .limit(settings.ingest_document_batch)
+            )
+            if owner_id is not None:
+                statement = statement.where(Document.owner_id == owner_id)
+            batch = db.execute(statement).scalars().all()
+            if not batch:
+                break
+
+            stats = doc_processor.process_documents(batch)
+            documents += len(batch)
+            embedded += stats.texts
+            embedding_seconds += stats.seconds
+            last_id = batch[-1].id
+
+        return {
+            "status": "success",
+            "documents": documents,
+            "embeddings": embedded,
+            "embeddings_per_second": round(embedded / embedding_seconds, 1) if embedding_seconds else 0.0
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+    finally:
+        db.close()
@@ -1,10 +1,19 @@
 from celery import Celery
+from kombu import Queue
 from ..config import settings
 
+# Interactive work (a new user's first sync, direct uploads) must never wait
+# behind scheduled re-syncs or bulk re-embeds, so each class gets its own queue
+# and, in production, its own workers (see run_worker.py).
+INTERACTIVE_QUEUE = 'interactive'
+SYNC_QUEUE = 'sync'
+BULK_QUEUE = 'bulk'
+
 celery_app = Celery(
     'knowledge_assistant',
     broker=settings.celery_broker_url,
-    backend=settings.celery_result_backend
+    backend=settings.celery_result_backend,
+    include=['app.tasks.document_sync', 'app.tasks.document_upload', 'app.tasks.bulk', 'app.tasks.worker']
 )
 
 celery_app.conf.update(
@@ -13,4 +22,53 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
-) 
\ No newline at end of file
+    # Recycle worker processes so model memory cannot creep upward
+    worker_max_tasks_per_child=settings.celery_max_tasks_per_child,
+    worker_max_memory_per_child=settings.celery_max_memory_per_child_kb,
+    task_queues=(
+        Queue(INTERACTIVE_QUEUE),
+        Queue(SYNC_QUEUE),
+        Queue(BULK_QUEUE),
+    ),
+    task_default_queue=SYNC_QUEUE,
+    task_routes={
+        'app.tasks.document_upload.process_uploaded_file': {'queue': INTERACTIVE_QUEUE},
+        'worker.health_check': {'queue': INTERACTIVE_QUEUE},
+        'app.tasks.document_sync.*': {'queue': SYNC_QUEUE},
+        'app.tasks.bulk.*': {'queue': BULK_QUEUE},
+    },
+    # Tasks run for minutes to hours; a worker should not hoard queued ones
+    worker_prefetch_multiplier=1,
+    beat_schedule={
+        'resync-drive-users': {
+            'task': 'app.tasks.document_sync.resync_all_users',
+            'schedule': settings.celery_resync_interval_seconds,
+        },
+    },
+)
+
+# Worker profiles used by run_worker.py: which queues a worker consumes, how many
+# processes it runs and how many messages each process may reserve ahead.
+WORKER_PROFILES = {
+    'interactive': {
+        'queues': [INTERACTIVE_QUEUE],
+        'concurrency': settings.celery_interactive_concurrency,
+        'prefetch_multiplier': 1,
+    },
+    'sync': {
+        'queues': [SYNC_QUEUE],
+        'concurrency': settings.celery_sync_concurrency,
+        'prefetch_multiplier': 1,
+    },
+    'bulk': {
+        'queues': [BULK_QUEUE],
+        'concurrency': settings.celery_bulk_concurrency,
+        'prefetch_multiplier': 1,
+    },
+    # Single-worker setup for development; queues are consumed without strict priority
+    'all': {
+        'queues': [INTERACTIVE_QUEUE, SYNC_QUEUE, BULK_QUEUE],
+        'concurrency': settings.celery_interactive_concurrency + settings.celery_sync_concurrency,
+        'prefetch_multiplier': 1,
+    },
+}
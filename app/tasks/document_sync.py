@@ -1,12 +1,17 @@
 from celery import shared_task
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from .celery_app import celery_app
+from .celery_app import SYNC_QUEUE, celery_app
+from ..config import settings
+from ..crud import clear_catalog_refresh
 from ..database import SessionLocal
 from ..models import User, Document, DocumentEmbedding
 from ..services.google_drive import GoogleDriveService
 from ..services.document_processor import DocumentProcessor
+from ..services.drive_catalog import list_catalog_files, refresh_catalog
+from ..metrics import INGEST_STAGE_SECONDS, span
+from .worker import get_document_processor
 
 SUPPORTED_MIME_TYPES = [
     'text/plain',
@@ -28,34 +33,55 @@ def sync_user_documents(user_id: int):
             return {"status": "error", "message": "User not found or not authenticated"}
 
         # Initialize services
-        drive_service = GoogleDriveService(user.google_credentials)
-        doc_processor = DocumentProcessor(db)
+        drive_service = GoogleDriveService.for_user(user.id, user.google_credentials)
+        doc_processor = get_document_processor(db)
 
-        # List files from Google Drive
+        # Bring the file catalog up to date from the Drive changes feed, then read from it
         mime_types = [
             'text/plain',
             'application/pdf',
             'application/vnd.google-apps.document'
         ]
-        files = drive_service.list_files(mime_types)
+        with span(INGEST_STAGE_SECONDS, stage="list"):
+            refresh_catalog(db, user, drive_service)
+            files = list_catalog_files(db, user.id, mime_types)
 
         processed_count = 0
+        embedded_count = 0
+        embedding_seconds = 0.0
+        # (document id, extracted text): ORM rows would be expired by each commit and re-loaded one by one
+        pending: List[Tuple[int, str]] = []
+
+        def flush_pending():
+            # Embed the gathered documents in shared, length-sorted batches
+            nonlocal embedded_count, embedding_seconds
+            if pending:
+                stats = doc_processor.process_documents(pending)
+                embedded_count += stats.texts
+                embedding_seconds += stats.seconds
+                pending.clear()
+
         for file in files:
             # Check if document already exists
             existing_doc = db.query(Document).filter(
                 Document.google_file_id == file['id']
             ).first()
 
-            # Download and process the file
-            content, metadata = drive_service.download_file(file['id'])
+            # Download to a disk-backed temp file and extract text from it as a stream
+            with span(INGEST_STAGE_SECONDS, stage="download"):
+                downloaded, metadata = drive_service.download_to_file(file['id'], metadata=file)
+            if downloaded is None:
+                continue
+            with downloaded, span(INGEST_STAGE_SECONDS, stage="extract"):
+                content = doc_processor.extract_text(downloaded, file['mimeType'])
             if content:
                 if existing_doc:
                     # Update existing document
                     existing_doc.content = content
                     existing_doc.title = file['name']
                     existing_doc.mime_type = file['mimeType']
+                    document_id = existing_doc.id
                     db.commit()
-                    doc_processor.process_document(existing_doc)
                 else:
                     # Create new document
                     new_doc = Document(
@@ -66,14 +92,22 @@ def sync_user_documents(user_id: int):
                         owner_id=user_id
                     )
                     db.add(new_doc)
+                    db.flush()
+                    document_id = new_doc.id
                     db.commit()
-                    doc_processor.process_document(new_doc)
-                
+                pending.append((document_id, content))
+
                 processed_count += 1
+                if len(pending) >= settings.ingest_document_batch:
+                    flush_pending()
+
+        flush_pending()
 
         return {
             "status": "success",
-            "message": f"Processed {processed_count} documents"
+            "message": f"Processed {processed_count} documents",
+            "embeddings": embedded_count,
+            "embeddings_per_second": round(embedded_count / embedding_seconds, 1) if embedding_seconds else 0.0
         }
 
     except Exception as e:
@@ -82,6 +116,42 @@ def sync_user_documents(user_id: int):
     finally:
         db.close()
 
+@shared_task
+def refresh_drive_catalog(user_id: int):
+    """Refresh the user's Drive file catalog without downloading anything."""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user or not user.google_credentials:
+            return {"status": "error", "message": "User not found or not authenticated"}
+
+        drive_service = GoogleDriveService.for_user(user.id, user.google_credentials)
+        counts = refresh_catalog(db, user, drive_service)
+        return {"status": "success", **counts}
+
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+    finally:
+        # Done or failed, the next /files request may queue another refresh if still needed
+        clear_catalog_refresh(db, user_id)
+        db.close()
+
+@shared_task
+def resync_all_users():
+    """Queue a re-sync for every user with Google credentials (run by celery beat)."""
+    db = SessionLocal()
+    try:
+        user_ids = [
+            user_id for (user_id,) in db.query(User.id).filter(User.google_credentials.isnot(None)).all()
+        ]
+    finally:
+        db.close()
+
+    for user_id in user_ids:
+        sync_user_documents.apply_async(args=[user_id], queue=SYNC_QUEUE)
+    return {"status": "success", "queued": len(user_ids)}
+
 def process_document(
     db: Session,
     drive_service: GoogleDriveService,
@@ -101,7 +171,7 @@ def process_document(
             return  # Document is up to date
 
     # Download and process document
-    content, metadata = drive_service.download_file(file_metadata['id'])
+    content, metadata = drive_service.download_file(file_metadata['id'], metadata=file_metadata)
     if not content:
         return
 
@@ -140,7 +210,7 @@ def process_document(
             document_id=existing_doc.id,
             chunk_index=chunk_data['chunk_index'],
             chunk_text=chunk_data['chunk_text'],
-            embedding_vector=chunk_data['embedding_vector']
+            embedding=chunk_data['embedding']
         )
         db.add(embedding)
 
@@ -0,0 +1,42 @@
+import os
+from celery import shared_task
+from ..database import SessionLocal
+from ..metrics import INGEST_STAGE_SECONDS, span
+from ..models import Document
+from .worker import get_document_processor
+
+@shared_task
+def process_uploaded_file(path: str, filename: str, mime_type: str, owner_id: int):
+    """
+    Extract, chunk and embed a file uploaded directly to the API, then delete the temp file.
+    ``path`` is in ``settings.upload_dir``, which this worker must share with the API.
+    """
+    db = SessionLocal()
+    try:
+        doc_processor = get_document_processor(db)
+        with open(path, 'rb') as f, span(INGEST_STAGE_SECONDS, stage="extract"):
+            content = doc_processor.extract_text(f, mime_type)
+
+        document = Document(
+            title=filename,
+            content=content,
+            mime_type=mime_type,
+            owner_id=owner_id
+        )
+        db.add(document)
+        db.commit()
+
+        stats = doc_processor.process_documents([(document.id, content)])
+        return {
+            "status": "success",
+            "document_id": document.id,
+            "chunks": stats.texts
+        }
+
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+    finally:
+        db.close()
+        if os.path.exists(path):
+            os.remove(path)
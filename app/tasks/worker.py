@@ -0,0 +1,101 @@
+"""
+Worker process lifecycle: load the embedding model once per process and
+reuse one DocumentProcessor across tasks.
+"""
+import logging
+import os
+import resource
+from typing import Optional
+from celery.signals import task_postrun, worker_process_init, worker_process_shutdown
+from sqlalchemy.orm import Session
+from .celery_app import celery_app
+from ..config import settings
+from .. import database, metrics
+from ..services.document_processor import DocumentProcessor
+from ..services.embeddings import get_embedding_model
+
+logger = logging.getLogger(__name__)
+
+_processor: Optional[DocumentProcessor] = None
+
+
+def get_document_processor(db: Session) -> DocumentProcessor:
+    """Return this process's DocumentProcessor bound to ``db``.
+
+    Prefork workers run one task at a time per process, so rebinding the
+    session on the shared processor is safe.
+    """
+    global _processor
+    if _processor is None:
+        _processor = DocumentProcessor(db)
+    else:
+        _processor.db = db
+    return _processor
+
+
+def check_embedding_model() -> dict:
+    """Run a tiny encode to prove the model is loaded and working."""
+    model = get_embedding_model()
+    vector = model.encode(["health check"], show_progress_bar=False)[0]
+    return {
+        "model": settings.embedding_model,
+        "backend": settings.embedding_backend,
+        "dimension": int(vector.shape[0]),
+        "pid": os.getpid(),
+        # ru_maxrss is reported in kilobytes on Linux
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+@worker_process_init.connect
+def prewarm_worker_process(**kwargs):
+    """Load the model before the first task; a broken model fails the process at start."""
+    # Pooled connections inherited from the parent process must not be shared;
+    # the worker profile also uses a smaller pool
+    database.configure_engine("worker")
+    # A dead process may have left a snapshot under this PID; keep its totals, not its place
+    retire_metrics()
+    db = database.SessionLocal()
+    try:
+        get_document_processor(db)
+        status = check_embedding_model()
+        logger.info("Worker process %s ready: %s (%s dims)", status["pid"], status["model"], status["dimension"])
+    finally:
+        db.close()
+
+
+def _snapshot_path() -> str:
+    return os.path.join(settings.metrics_dir, f"worker-{os.getpid()}.json")
+
+
+@task_postrun.connect
+def publish_metrics(**kwargs):
+    """Write this process's metrics where the API's /metrics endpoint picks them up."""
+    try:
+        metrics.write_snapshot(_snapshot_path())
+    except OSError as e:
+        logger.warning("Could not write metrics snapshot: %s", e)
+
+
+def retire_metrics():
+    """Fold this PID's snapshot into the retired totals and delete it."""
+    try:
+        metrics.retire_snapshot(_snapshot_path())
+    except OSError as e:
+        logger.warning("Could not retire metrics snapshot: %s", e)
+
+
+@worker_process_shutdown.connect
+def retire_worker_metrics(**kwargs):
+    """Recycled processes would otherwise leave a snapshot behind forever."""
+    publish_metrics()
+    retire_metrics()
+
+
+@celery_app.task(name="worker.health_check")
+def health_check():
+    """Report whether this worker process has a working embedding model."""
+    try:
+        return {"status": "ok", **check_embedding_model()}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
@@ -0,0 +1,72 @@
+"""
+Chunk-write throughput: per-object ORM adds with a commit every 10 rows
+versus the single-transaction bulk path in crud.replace_document_chunks.
+
+    python -m benchmarks.bench_chunk_writes --documents 20 --chunks 500
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import replace_document_chunks
+from app.database import Base
+from app.models import Document, DocumentChunk
+from benchmarks.utils import timer
+
+
+def write_per_object(db, document_id, chunks, embeddings):
+    """The previous write path, kept here as the baseline."""
+    db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).delete()
+    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+        db.add(DocumentChunk(
+            content=chunk,
+            embedding=embedding.astype(np.float32).tobytes(),
+            document_id=document_id,
+            chunk_index=i
+        ))
+        if (i + 1) % 10 == 0:
+            db.commit()
+    db.commit()
+
+
+def run(writer, documents, chunks_per_document, dimension):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            docs = [Document(title=f"doc {i}", content="") for i in range(documents)]
+            db.add_all(docs)
+            db.commit()
+            chunks = [f"chunk text {i} " * 20 for i in range(chunks_per_document)]
+            embeddings = np.random.default_rng(0).random((chunks_per_document, dimension), dtype=np.float32)
+
+            with timer() as elapsed:
+                for doc in docs:
+                    writer(db, doc.id, chunks, embeddings)
+            assert db.query(DocumentChunk).count() == documents * chunks_per_document
+            return elapsed[0]
+        finally:
+            db.close()
+            engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunk persistence")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=500, help="chunks per document")
+    parser.add_argument("--dimension", type=int, default=384)
+    args = parser.parse_args()
+
+    total = args.documents * args.chunks
+    for name, writer in [("per-object", write_per_object), ("bulk", replace_document_chunks)]:
+        seconds = run(writer, args.documents, args.chunks, args.dimension)
+        print(f"{name:>12}: {total} chunks in {seconds:.3f}s ({total / seconds:,.0f} chunks/s)")
+
+
+if __name__ == "__main__":
+    main()
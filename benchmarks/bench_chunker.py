@@ -0,0 +1,40 @@
+"""
+Throughput benchmark for TextChunker on multi-megabyte inputs.
+
+    python -m benchmarks.bench_chunker --sizes 1 4 16
+    python -m benchmarks.bench_chunker --tokenizer   # count with the embedding model's tokenizer
+"""
+import argparse
+
+from app.services.chunker import TextChunker
+from benchmarks.utils import generate_text, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming text chunker")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 16], help="input sizes in MB")
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--overlap-tokens", type=int, default=40)
+    parser.add_argument("--tokenizer", action="store_true", help="use the embedding model tokenizer")
+    args = parser.parse_args()
+
+    token_counter = None
+    if args.tokenizer:
+        from sentence_transformers import SentenceTransformer
+        from app.config import settings
+        tokenizer = SentenceTransformer(settings.embedding_model).tokenizer
+        token_counter = lambda text: len(tokenizer.tokenize(text))
+
+    chunker = TextChunker(args.max_tokens, args.overlap_tokens, token_counter)
+
+    print(f"{'size':>8} {'chunks':>9} {'seconds':>9} {'MB/s':>8} {'chunks/s':>10}")
+    for size_mb in args.sizes:
+        text = generate_text(size_mb * 1024 * 1024, seed=size_mb)
+        with timer() as elapsed:
+            count = sum(1 for _ in chunker.iter_chunks(text))
+        seconds = elapsed[0]
+        print(f"{size_mb:>6}MB {count:>9} {seconds:>9.3f} {size_mb / seconds:>8.2f} {count / seconds:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
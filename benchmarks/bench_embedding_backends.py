@@ -0,0 +1,48 @@
+"""
+Throughput comparison of the embedding backends on CPU.
+
+    python export_onnx_model.py
+    python -m benchmarks.bench_embedding_backends --texts 2000 --threads 4
+"""
+import argparse
+
+import numpy as np
+
+from app.config import settings
+from app.services.chunker import TextChunker
+from app.services.embeddings import BACKENDS, get_embedding_model
+from benchmarks.utils import generate_text, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding backend throughput")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=settings.embedding_batch_size)
+    parser.add_argument("--threads", type=int, default=settings.embedding_threads)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    args = parser.parse_args()
+
+    settings.embedding_threads = args.threads
+    chunker = TextChunker(settings.chunk_max_tokens, settings.chunk_overlap_tokens)
+    texts = []
+    for chunk in chunker.iter_chunks(generate_text(args.texts * 1200)):
+        texts.append(chunk.text)
+        if len(texts) == args.texts:
+            break
+
+    reference = None
+    print(f"{'backend':>22} {'seconds':>9} {'emb/s':>9} {'min cos':>9}")
+    for backend in args.backends:
+        model = get_embedding_model(backend)
+        model.encode(texts[:8], batch_size=8)  # warm up
+        with timer() as elapsed:
+            embeddings = np.asarray(model.encode(texts, batch_size=args.batch_size), dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        if reference is None:
+            reference = embeddings
+        min_cosine = float((reference * embeddings).sum(axis=1).min())
+        print(f"{backend:>22} {elapsed[0]:>9.2f} {len(texts) / elapsed[0]:>9.1f} {min_cosine:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
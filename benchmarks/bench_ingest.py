@@ -0,0 +1,249 @@
+"""
+End-to-end ingestion benchmark: DocumentProcessor.process_document and the
+sync_user_documents task, on generated text and PDF documents served by a
+local fake Drive service.
+
+Reports chunks/s, embeddings/s, database write rate, peak RSS and the time
+split across the ingest stages (from app.metrics spans). Each phase runs in a
+fresh process. By default embeddings come from the deterministic fake
+embedder, so the numbers isolate our own pipeline; pass --real-model to use
+the configured embedding backend.
+
+    python -m benchmarks.bench_ingest --documents 200 --size-kb 50
+    python -m benchmarks.bench_ingest --real-model --documents 50
+    python -m benchmarks.compare data/benchmarks/ingest-<old>.json data/benchmarks/ingest-<new>.json
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.utils import FakeEmbedder, generate_text, peak_rss_mb, timer, write_results
+
+STAGES = ["list", "download", "extract", "chunk", "embed", "persist"]
+
+
+def make_pdf(text: str, lines_per_page: int = 60) -> bytes:
+    """Build a minimal multi-page PDF with ``text`` in Helvetica, readable by PyPDF2."""
+    lines = [line for paragraph in text.split("\n") for line in textwrap.wrap(paragraph, 90) or [""]]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in pages:
+        escaped = (line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page)
+        stream = "BT /F1 10 Tf 12 TL 50 770 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        data = stream.encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(data), data))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_files(args) -> Dict[str, Tuple[dict, bytes]]:
+    """Drive-shaped metadata and raw bytes for each generated document."""
+    rng = random.Random(args.seed)
+    files = {}
+    for i in range(args.documents):
+        text = generate_text(int(args.size_kb * 1024 * rng.uniform(0.5, 1.5)), seed=args.seed + i)
+        kind = rng.random()
+        if kind < args.pdf_fraction:
+            mime_type, data = "application/pdf", make_pdf(text)
+        elif kind < args.pdf_fraction + (1 - args.pdf_fraction) / 2:
+            mime_type, data = "application/vnd.google-apps.document", text.encode("utf-8")
+        else:
+            mime_type, data = "text/plain", text.encode("utf-8")
+        file_id = f"file-{i:06d}"
+        files[file_id] = ({
+            "id": file_id,
+            "name": f"Document {i}",
+            "mimeType": mime_type,
+            "createdTime": "2024-01-01T00:00:00Z",
+            "modifiedTime": "2024-01-01T00:00:00Z"
+        }, data)
+    return files
+
+
+class FakeDriveService:
+    """Serves generated files through the GoogleDriveService methods ingestion calls."""
+
+    def __init__(self, files: Dict[str, Tuple[dict, bytes]]):
+        self.files = files
+
+    def ensure_fresh_credentials(self):
+        pass
+
+    def get_start_page_token(self) -> str:
+        return "1"
+
+    def iter_file_pages(self) -> Iterator[List[dict]]:
+        metadata = [meta for meta, _ in self.files.values()]
+        for start in range(0, len(metadata), 1000):
+            yield metadata[start:start + 1000]
+
+    def iter_changes(self, page_token: str):
+        return iter(())
+
+    def download_to_file(self, file_id: str, metadata=None):
+        from app.config import settings
+        meta, data = self.files[file_id]
+        spool = tempfile.SpooledTemporaryFile(max_size=settings.drive_spool_max_bytes)
+        spool.write(data)
+        spool.seek(0)
+        return spool, meta
+
+
+def _setup(tmp: str, real_model: bool):
+    """Point the app at a scratch database and, unless ``real_model``, the fake embedder."""
+    from app import database
+    from app.database import Base, create_db_engine
+    from app.services import document_processor
+
+    engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile="worker")
+    Base.metadata.create_all(bind=engine)
+    database.SessionLocal.configure(bind=engine)
+    if not real_model:
+        embedder = FakeEmbedder()
+        document_processor.get_embedding_model = lambda: embedder
+    return engine
+
+
+def _summarize(seconds: float, documents: int, chunks: int, embeddings: int) -> dict:
+    from app.metrics import INGEST_STAGE_SECONDS
+
+    stage_seconds = {stage: total for (stage,), (_, total) in INGEST_STAGE_SECONDS.totals().items()}
+    staged = sum(stage_seconds.values()) or 1.0
+    result = {
+        "documents": documents,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "documents_per_second": round(documents / seconds, 2),
+        "chunks_per_second": round(chunks / seconds, 1),
+        "embeddings_per_second": round(embeddings / stage_seconds["embed"], 1) if stage_seconds.get("embed") else 0.0,
+        "db_rows_per_second": round(chunks / stage_seconds["persist"], 1) if stage_seconds.get("persist") else 0.0,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    for stage in STAGES:
+        if stage in stage_seconds:
+            result[f"stage_{stage}_seconds"] = round(stage_seconds[stage], 3)
+            result[f"stage_{stage}_share"] = round(stage_seconds[stage] / staged, 3)
+    return result
+
+
+def run_processor(args) -> dict:
+    """Extract, then process_document one document at a time, as the upload task does."""
+    from app.metrics import INGEST_STAGE_SECONDS, span
+    from app.models import Document, DocumentChunk
+    from app.services.document_processor import DocumentProcessor
+
+    files = make_files(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _setup(tmp, args.real_model)
+        db = sessionmaker(bind=engine)()
+        try:
+            processor = DocumentProcessor(db)
+            INGEST_STAGE_SECONDS.reset()
+            embeddings = 0
+            with timer() as elapsed:
+                for meta, data in files.values():
+                    with span(INGEST_STAGE_SECONDS, stage="extract"):
+                        content = processor.extract_text(io.BytesIO(data), meta["mimeType"])
+                    document = Document(title=meta["name"], content=content, mime_type=meta["mimeType"], owner_id=1)
+                    db.add(document)
+                    db.commit()
+                    embeddings += processor.process_document(document).texts
+                    db.expunge_all()
+            chunks = db.execute(select(func.count(DocumentChunk.id))).scalar()
+        finally:
+            db.close()
+            engine.dispose()
+    return _summarize(elapsed[0], len(files), chunks, embeddings)
+
+
+def run_sync(args) -> dict:
+    """Run sync_user_documents for one user whose drive holds the generated files."""
+    from app.metrics import INGEST_STAGE_SECONDS
+    from app.models import DocumentChunk, User
+    from app.tasks import document_sync
+
+    files = make_files(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _setup(tmp, args.real_model)
+        db = sessionmaker(bind=engine)()
+        try:
+            user = User(email="bench@example.com", hashed_password="x", google_credentials={"token": "fake"})
+            db.add(user)
+            db.commit()
+            fake_drive = FakeDriveService(files)
+            document_sync.GoogleDriveService = SimpleNamespace(for_user=lambda user_id, credentials: fake_drive)
+
+            INGEST_STAGE_SECONDS.reset()
+            with timer() as elapsed:
+                outcome = document_sync.sync_user_documents(user.id)
+            if outcome.get("status") != "success":
+                raise RuntimeError(f"sync_user_documents failed: {outcome.get('message')}")
+            chunks = db.execute(select(func.count(DocumentChunk.id))).scalar()
+        finally:
+            db.close()
+            engine.dispose()
+    return _summarize(elapsed[0], len(files), chunks, outcome["embeddings"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document ingestion end to end")
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--size-kb", type=float, default=50, help="mean extracted text size per document")
+    parser.add_argument("--pdf-fraction", type=float, default=0.3)
+    parser.add_argument("--real-model", action="store_true", help="embed with the configured backend")
+    parser.add_argument("--phases", nargs="+", choices=["processor", "sync"], default=["processor", "sync"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default: data/benchmarks/ingest-<commit>.json)")
+    args = parser.parse_args()
+
+    runners = {"processor": run_processor, "sync": run_sync}
+    cases = {}
+    for phase in args.phases:
+        # A fresh process per phase, so peak RSS and the model cache don't carry over
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(runners[phase], args).result()
+        cases[phase] = result
+        print(f"\n{phase}: {result['documents']} documents, {result['chunks']} chunks in {result['seconds']:.2f}s")
+        print(f"  {result['chunks_per_second']:.1f} chunks/s, {result['embeddings_per_second']:.1f} embeddings/s, "
+              f"{result['db_rows_per_second']:.1f} DB rows/s, peak RSS {result['peak_rss_mb']:.1f} MB")
+        for stage in STAGES:
+            if f"stage_{stage}_seconds" in result:
+                print(f"  {stage:>9}: {result[f'stage_{stage}_seconds']:>8.2f}s "
+                      f"({result[f'stage_{stage}_share'] * 100:5.1f}%)")
+
+    path = write_results(args.output, "ingest", vars(args), cases)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
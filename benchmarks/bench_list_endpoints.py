@@ -0,0 +1,87 @@
+"""
+List endpoint benchmark at 100k rows: deep OFFSET pages versus keyset
+cursors, lazy (N+1) versus selectin relationship loading, and full-walk
+response serialization throughput.
+
+    python -m benchmarks.bench_list_endpoints --rows 100000
+"""
+import argparse
+import os
+import tempfile
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models, schemas
+from app.database import Base
+from app.routers.documents import read_documents
+from app.routers.users import read_users
+from benchmarks.utils import timer
+
+PAGE = 1000
+
+
+def seed(db, rows):
+    db.execute(insert(models.User), [{"email": f"user{i}@example.com", "hashed_password": "x"} for i in range(rows)])
+    db.execute(insert(models.Item), [{"title": f"item {i}", "description": "d", "owner_id": i + 1} for i in range(rows)])
+    db.execute(insert(models.Document), [
+        {"title": f"doc {i}", "content": "body " * 500, "mime_type": "text/plain", "owner_id": i % 100 + 1}
+        for i in range(rows)
+    ])
+    db.commit()
+
+
+def deep_page(db, rows):
+    with timer() as offset_elapsed:
+        offset_users = db.query(models.User).offset(rows - PAGE).limit(PAGE).all()
+        [schemas.User.model_validate(user) for user in offset_users]  # lazy loads items per user
+    db.expunge_all()
+    with timer() as keyset_elapsed:
+        page = read_users(after=rows - PAGE, limit=PAGE, db=db)
+        schemas.Page[schemas.User].model_validate(page)
+    db.expunge_all()
+    print(f"last page of users, OFFSET + lazy items: {offset_elapsed[0] * 1000:8.1f} ms")
+    print(f"last page of users, keyset + selectin:   {keyset_elapsed[0] * 1000:8.1f} ms")
+
+
+def full_walk(db, endpoint, schema, label):
+    page_schema = schemas.Page[schema]
+    total = 0
+    after = None
+    with timer() as elapsed:
+        while True:
+            page = endpoint(after=after, limit=PAGE, db=db)
+            total += len(page_schema.model_validate(page).model_dump_json())
+            db.expunge_all()
+            after = page["next_cursor"]
+            if after is None:
+                break
+    print(f"serialize all {label}: {elapsed[0]:.2f}s ({total / elapsed[0] / 1e6:.1f} MB/s of JSON)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark paginated list endpoints")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            seed(db, args.rows)
+            deep_page(db, args.rows)
+            full_walk(db, read_users, schemas.User, "users")
+            full_walk(
+                db,
+                lambda after, limit, db: read_documents(owner_id=None, after=after, limit=limit, db=db),
+                schemas.DocumentSummary,
+                "documents"
+            )
+        finally:
+            db.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
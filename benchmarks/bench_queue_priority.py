@@ -0,0 +1,187 @@
+"""
+Discrete-event simulation of the Celery queue layout under a mixed workload:
+long re-syncs of existing tenants and bulk re-embeds are already queued when
+new users connect Drive and others upload files.
+
+Task queues come from the task_routes in app.tasks.celery_app, and the
+"dedicated workers" and "all" layouts from its WORKER_PROFILES (concurrency can
+be overridden on the command line). They are compared with one shared queue and
+one worker consuming all three queues at the old prefetch multiplier, both with
+as many processes as the dedicated workers together. The headline number is how
+long a new user waits until their first document is searchable.
+
+    python -m benchmarks.bench_queue_priority --tenants 20 --new-users 10
+"""
+import argparse
+import fnmatch
+import heapq
+import itertools
+import random
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional
+
+from app.tasks.celery_app import INTERACTIVE_QUEUE, WORKER_PROFILES, celery_app
+
+# Celery task behind each simulated kind of work
+TASK_NAMES = {
+    "resync": "app.tasks.document_sync.sync_user_documents",
+    "reembed": "app.tasks.bulk.reembed_documents",
+    "upload": "app.tasks.document_upload.process_uploaded_file",
+}
+
+
+class Task(NamedTuple):
+    kind: str  # "first_sync", "upload", "resync" or "reembed"
+    queue: str
+    arrival: float  # seconds
+    duration: float
+    first_result: float  # seconds after start until the first document is searchable
+
+
+def queue_for(kind: str) -> str:
+    """The queue ``kind`` is routed to by the app's Celery configuration."""
+    if kind == "first_sync":
+        return INTERACTIVE_QUEUE  # the OAuth callback sends it there explicitly
+    for pattern, route in celery_app.conf.task_routes.items():
+        if fnmatch.fnmatchcase(TASK_NAMES[kind], pattern):
+            return route["queue"]
+    return celery_app.conf.task_default_queue
+
+
+class Node:
+    """A worker node: ``concurrency`` processes that reserve up to concurrency * prefetch messages."""
+
+    def __init__(self, name: str, queues: List[str], concurrency: int, prefetch_multiplier: int):
+        self.name = name
+        self.queues = queues
+        self.concurrency = concurrency
+        self.prefetch_limit = concurrency * prefetch_multiplier
+        self.reserved: deque = deque()
+        self.running = 0
+        self._next_queue = itertools.cycle(range(len(queues)))
+
+
+def build_workload(args) -> List[Task]:
+    rng = random.Random(args.seed)
+    window = args.window_minutes * 60
+    tasks = []
+    for _ in range(args.tenants):
+        duration = rng.lognormvariate(0, 0.6) * args.resync_minutes * 60
+        tasks.append(Task("resync", queue_for("resync"), 0.0, duration, args.first_doc_seconds))
+    for _ in range(args.reembeds):
+        tasks.append(Task("reembed", queue_for("reembed"), 0.0, args.reembed_minutes * 60, args.reembed_minutes * 60))
+    for _ in range(args.new_users):
+        duration = rng.lognormvariate(0, 0.5) * args.first_sync_minutes * 60
+        tasks.append(Task("first_sync", queue_for("first_sync"), rng.uniform(0, window), duration, args.first_doc_seconds))
+    for _ in range(args.uploads):
+        duration = rng.uniform(0.5, 1.5) * args.upload_seconds
+        tasks.append(Task("upload", queue_for("upload"), rng.uniform(0, window), duration, duration))
+    return sorted(tasks, key=lambda task: task.arrival)
+
+
+def simulate(tasks: List[Task], nodes: List[Node], route: Optional[Dict[str, str]] = None) -> Dict[str, List[float]]:
+    """Run the workload and return, per task kind, seconds from arrival to first searchable result.
+
+    ``route`` renames queues, e.g. to send everything to one shared queue.
+    """
+    broker: Dict[str, deque] = {}
+    events: list = []
+    sequence = itertools.count()  # tie-breaker so the heap never compares tasks
+    for task in tasks:
+        heapq.heappush(events, (task.arrival, next(sequence), "arrive", task, None))
+
+    waits: Dict[str, List[float]] = {}
+    finished: Dict[str, float] = {}
+
+    def dispatch(now: float):
+        for node in nodes:
+            # Reserve messages from the node's queues, round-robin, up to the prefetch limit
+            while len(node.reserved) < node.prefetch_limit:
+                for _ in node.queues:
+                    queue = broker.get(node.queues[next(node._next_queue)])
+                    if queue:
+                        node.reserved.append(queue.popleft())
+                        break
+                else:
+                    break
+            while node.running < node.concurrency and node.reserved:
+                task = node.reserved.popleft()
+                node.running += 1
+                waits.setdefault(task.kind, []).append(now + task.first_result - task.arrival)
+                heapq.heappush(events, (now + task.duration, next(sequence), "finish", task, node))
+
+    while events:
+        now, _, kind, task, node = heapq.heappop(events)
+        if kind == "arrive":
+            queue = (route or {}).get(task.queue, task.queue)
+            broker.setdefault(queue, deque()).append(task)
+        else:
+            node.running -= 1
+            finished[task.kind] = max(finished.get(task.kind, 0.0), now)
+        dispatch(now)
+
+    waits["_finished"] = [finished.get("resync", 0.0), finished.get("reembed", 0.0)]
+    return waits
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def report(name: str, waits: Dict[str, List[float]]):
+    first = waits.get("first_sync", [])
+    uploads = waits.get("upload", [])
+    resyncs_done, reembeds_done = waits["_finished"]
+    print(f"{name:>30} {percentile(first, 0.5) / 60:9.1f} {percentile(first, 0.95) / 60:9.1f} "
+          f"{max(first, default=0) / 60:9.1f} {percentile(uploads, 0.95) / 60:12.1f} "
+          f"{resyncs_done / 3600:12.2f} {reembeds_done / 3600:12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate interactive vs bulk Celery queue layouts")
+    parser.add_argument("--tenants", type=int, default=20, help="re-syncs queued at the start")
+    parser.add_argument("--resync-minutes", type=float, default=90)
+    parser.add_argument("--reembeds", type=int, default=2, help="bulk re-embeds queued at the start")
+    parser.add_argument("--reembed-minutes", type=float, default=240)
+    parser.add_argument("--new-users", type=int, default=10, help="first syncs arriving during the window")
+    parser.add_argument("--first-sync-minutes", type=float, default=10)
+    parser.add_argument("--first-doc-seconds", type=float, default=30,
+                        help="from task start until the first document batch is embedded")
+    parser.add_argument("--uploads", type=int, default=30)
+    parser.add_argument("--upload-seconds", type=float, default=20)
+    parser.add_argument("--window-minutes", type=float, default=120)
+    for profile in ("interactive", "sync", "bulk"):
+        parser.add_argument(f"--{profile}", type=int, default=WORKER_PROFILES[profile]["concurrency"],
+                            help=f"{profile} worker processes (default: WORKER_PROFILES)")
+    parser.add_argument("--prefetch", type=int, default=4, help="prefetch multiplier of the baseline layouts")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tasks = build_workload(args)
+    dedicated = [
+        Node(name, WORKER_PROFILES[name]["queues"], getattr(args, name), WORKER_PROFILES[name]["prefetch_multiplier"])
+        for name in ("interactive", "sync", "bulk")
+    ]
+    total = sum(node.concurrency for node in dedicated)
+    all_profile = WORKER_PROFILES["all"]
+    all_queues = [queue.name for queue in celery_app.conf.task_queues]
+    layouts = [
+        (f"shared queue ({total})", [Node("shared", ["shared"], total, args.prefetch)],
+         {queue: "shared" for queue in all_queues}),
+        (f"one worker, 3 queues ({total})", [Node("all", all_queues, total, args.prefetch)], None),
+        (f"'all' profile ({all_profile['concurrency']})",
+         [Node("all", all_profile["queues"], all_profile["concurrency"], all_profile["prefetch_multiplier"])], None),
+        (f"dedicated workers ({total})", dedicated, None),
+    ]
+
+    print(f"{len(tasks)} tasks; worker processes per layout in parentheses")
+    print("first doc: minutes from a new user's first sync being queued until a document is searchable")
+    print(f"{'layout':>30} {'first p50':>9} {'first p95':>9} {'first max':>9} {'upload p95':>12} "
+          f"{'resyncs (h)':>12} {'reembeds (h)':>12}")
+    for name, nodes, route in layouts:
+        report(name, simulate(tasks, nodes, route))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Retrieval benchmark for RAGService on synthetic corpora of 10k to 1M chunks.
+
+Vectors and queries come from a deterministic fake embedder and the LLM is a
+stub with a fixed latency, so the numbers cover only our own code: building the
+index from the database, search_similar_chunks and get_answer. Each corpus size
+runs in a fresh process so peak RSS is per size. Results are written as JSON
+for benchmarks.compare.
+
+    python -m benchmarks.bench_retrieval --chunks 10000 100000
+    python -m benchmarks.bench_retrieval --chunks 1000000 --queries 100
+    python -m benchmarks.compare data/benchmarks/retrieval-<old>.json data/benchmarks/retrieval-<new>.json
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.utils import (
+    WORDS, FakeEmbedder, generate_text, latency_summary, peak_rss_mb, timer, write_results
+)
+
+DIMENSION = 384
+CHUNKS_PER_DOCUMENT = 50
+INSERT_BATCH = 10_000
+
+
+class StubLLM:
+    """Mimics the parts of the OpenAI client RAGService uses, with a fixed latency."""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        time.sleep(self.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Stub answer."))])
+
+
+def seed_corpus(db, chunks: int, seed: int):
+    from app.models import Document, DocumentChunk
+
+    documents = max(1, chunks // CHUNKS_PER_DOCUMENT)
+    db.execute(insert(Document), [
+        {"title": f"document {i}", "content": "synthetic", "mime_type": "text/plain", "owner_id": 1}
+        for i in range(documents)
+    ])
+    # A pool of realistic chunk texts, reused across the corpus to keep seeding fast
+    pool = [generate_text(600, seed=seed + i) for i in range(1000)]
+    rng = np.random.default_rng(seed)
+    for start in range(0, chunks, INSERT_BATCH):
+        count = min(INSERT_BATCH, chunks - start)
+        vectors = rng.standard_normal((count, DIMENSION), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        db.execute(insert(DocumentChunk), [
+            {
+                "document_id": (start + i) // CHUNKS_PER_DOCUMENT + 1,
+                "chunk_index": (start + i) % CHUNKS_PER_DOCUMENT,
+                "content": pool[(start + i) % len(pool)],
+                "embedding": vectors[i].tobytes()
+            }
+            for i in range(count)
+        ])
+        db.commit()
+
+
+def make_queries(count: int, seed: int):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))) + "?" for _ in range(count)]
+
+
+def run_case(chunks: int, args) -> dict:
+    """Seed a corpus of ``chunks`` chunks and measure it; runs in its own process."""
+    from app.database import Base, create_db_engine
+    from app.metrics import QA_STAGE_SECONDS
+    from app.services.rag_service import RAGService
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile="api")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            with timer() as seed_elapsed:
+                seed_corpus(db, chunks, args.seed)
+
+            with timer() as build_elapsed:
+                service = RAGService(
+                    db,
+                    model=FakeEmbedder(DIMENSION),
+                    openai_client=StubLLM(args.llm_ms),
+                    index_file=os.path.join(tmp, "index.bin")
+                )
+            rss_after_build = peak_rss_mb()
+
+            queries = make_queries(args.queries, args.seed)
+            for query in queries[:5]:  # warm up
+                service.search_similar_chunks(query, k=args.k)
+            QA_STAGE_SECONDS.reset()
+
+            search_seconds = []
+            for query in queries:
+                start = time.perf_counter()
+                service.search_similar_chunks(query, k=args.k)
+                search_seconds.append(time.perf_counter() - start)
+                db.expunge_all()
+
+            answer_seconds = []
+            for query in queries:
+                start = time.perf_counter()
+                service.get_answer(query)
+                answer_seconds.append(time.perf_counter() - start)
+                db.expunge_all()
+        finally:
+            db.close()
+            engine.dispose()
+
+    result = {
+        "seed_seconds": round(seed_elapsed[0], 3),
+        "build_seconds": round(build_elapsed[0], 3),
+        "rss_after_build_mb": rss_after_build,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    result.update({f"search_{name}": value for name, value in latency_summary(search_seconds).items()})
+    result.update({f"answer_{name}": value for name, value in latency_summary(answer_seconds).items()})
+    for (stage,), (count, total) in sorted(QA_STAGE_SECONDS.totals().items()):
+        result[f"stage_{stage}_mean_ms"] = round(total / count * 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAGService retrieval on synthetic corpora")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10_000, 100_000], help="corpus sizes")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="latency of the stub LLM")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="results file (default: data/benchmarks/retrieval-<commit>.json)")
+    args = parser.parse_args()
+
+    cases = {}
+    print(f"{'chunks':>9} {'build s':>8} {'search p50':>11} {'p95':>8} {'p99':>8} {'q/s':>8} "
+          f"{'answer p50':>11} {'p99':>8} {'peak MB':>8}")
+    for chunks in args.chunks:
+        # A fresh process per size, so peak RSS and caches don't carry over
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(run_case, chunks, args).result()
+        cases[f"{chunks} chunks"] = result
+        print(f"{chunks:>9} {result['build_seconds']:>8.2f} {result['search_p50_ms']:>9.2f}ms "
+              f"{result['search_p95_ms']:>6.2f}ms {result['search_p99_ms']:>6.2f}ms "
+              f"{result['search_per_second']:>8.1f} {result['answer_p50_ms']:>9.2f}ms "
+              f"{result['answer_p99_ms']:>6.2f}ms {result['peak_rss_mb']:>8.1f}")
+
+    path = write_results(args.output, "retrieval", vars(args), cases)
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
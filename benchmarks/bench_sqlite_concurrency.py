@@ -0,0 +1,129 @@
+"""
+Mixed read/write SQLite benchmark: QA-style reads from several threads while
+a separate process rewrites document chunks the way a Celery sync does.
+
+Compares a bare engine (the previous configuration) with the tuned
+"api"/"worker" profiles from app.database.
+
+    python -m benchmarks.bench_sqlite_concurrency --seconds 10 --readers 8
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import replace_document_chunks
+from app.database import Base, create_db_engine
+from app.models import Document, DocumentChunk
+
+DIMENSION = 384
+
+
+def make_engine(url, tuned, profile):
+    if tuned:
+        return create_db_engine(url, profile=profile)
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def seed(url, documents, chunks_per_document):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    docs = [Document(title=f"doc {i}", content="") for i in range(documents)]
+    db.add_all(docs)
+    db.commit()
+    embeddings = np.random.default_rng(0).random((chunks_per_document, DIMENSION), dtype=np.float32)
+    for doc in docs:
+        replace_document_chunks(db, doc.id, [f"chunk {n}" for n in range(chunks_per_document)], embeddings)
+    db.close()
+    engine.dispose()
+
+
+def writer(url, tuned, documents, chunks_per_document, stop_at, counts):
+    """Rewrite documents' chunks until ``stop_at``, like a long-running sync."""
+    engine = make_engine(url, tuned, "worker")
+    db = sessionmaker(bind=engine)()
+    embeddings = np.random.default_rng(1).random((chunks_per_document, DIMENSION), dtype=np.float32)
+    chunks = [f"rewritten chunk {i}" for i in range(chunks_per_document)]
+    while time.time() < stop_at:
+        try:
+            replace_document_chunks(db, random.randint(1, documents), chunks, embeddings)
+            counts["writes"] += 1
+        except OperationalError:
+            counts["write_errors"] += 1
+    db.close()
+
+
+def reader(session_factory, documents, stop_at, latencies, errors):
+    """Issue the queries a QA request makes: document titles, then chunk hydration."""
+    while time.time() < stop_at:
+        start = time.perf_counter()
+        db = session_factory()
+        try:
+            db.execute(select(Document.id, Document.title)).all()
+            db.execute(
+                select(DocumentChunk).where(DocumentChunk.document_id == random.randint(1, documents)).limit(3)
+            ).all()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors.append(1)
+        finally:
+            db.close()
+
+
+def run(tuned, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed(url, args.documents, args.chunks)
+
+        manager = multiprocessing.Manager()
+        counts = manager.dict(writes=0, write_errors=0)
+        stop_at = time.time() + args.seconds
+        write_process = multiprocessing.Process(
+            target=writer, args=(url, tuned, args.documents, args.chunks, stop_at, counts)
+        )
+        write_process.start()
+
+        engine = make_engine(url, tuned, "api")
+        session_factory = sessionmaker(bind=engine)
+        latencies, errors = [], []
+        threads = [
+            threading.Thread(target=reader, args=(session_factory, args.documents, stop_at, latencies, errors))
+            for _ in range(args.readers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        write_process.join()
+        engine.dispose()
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if latencies else (0, 0, 0)
+        name = "tuned" if tuned else "default"
+        print(f"{name:>8}: reads={len(latencies)} read_errors={len(errors)} "
+              f"p50={p50:.1f}ms p95={p95:.1f}ms p99={p99:.1f}ms "
+              f"writes={counts['writes']} write_errors={counts['write_errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite mixed read/write concurrency benchmark")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=200, help="chunks per document")
+    args = parser.parse_args()
+
+    for tuned in (False, True):
+        run(tuned, args)
+
+
+if __name__ == "__main__":
+    main()
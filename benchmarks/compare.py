@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files written by benchmarks.utils.write_results.
+
+Metrics ending in ``per_second`` are better when higher; all others (latency,
+seconds, memory) are better when lower. Changes beyond ``--threshold`` percent
+are flagged, and ``--fail-on-regression`` turns flagged regressions into a
+non-zero exit status.
+
+    python -m benchmarks.compare data/benchmarks/retrieval-abc123.json data/benchmarks/retrieval-def456.json
+"""
+import argparse
+import json
+import sys
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("per_second")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=5.0, help="percent change worth flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        sys.exit(f"Cannot compare {baseline['benchmark']} results with {candidate['benchmark']} results")
+    if baseline.get("config") != candidate.get("config"):
+        print("Warning: the two runs used different settings; differences may not be meaningful")
+
+    print(f"{baseline['benchmark']}: {baseline['commit']} -> {candidate['commit']}")
+    regressions = 0
+    for case, old_metrics in baseline["cases"].items():
+        new_metrics = candidate["cases"].get(case)
+        if new_metrics is None:
+            print(f"\n{case}: missing from {args.candidate}")
+            continue
+        print(f"\n{case}")
+        for metric, old in old_metrics.items():
+            new = new_metrics.get(metric)
+            if new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            better = change > 0 if higher_is_better(metric) else change < 0
+            flag = ""
+            if abs(change) >= args.threshold:
+                flag = "improved" if better else "REGRESSED"
+                regressions += not better
+            print(f"  {metric:<28} {old:>12.3f} {new:>12.3f} {change:>+8.1f}%  {flag}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(f"\n{regressions} metric(s) regressed by more than {args.threshold}%")
+
+
+if __name__ == "__main__":
+    main()
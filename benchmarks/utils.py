@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Sequence
+
+WORDS = (
+    "the model document search index vector query answer drive sync chunk "
+    "token embedding retrieval context language learning data system network "
+    "performance latency throughput memory storage batch worker queue"
+).split()
+
+
+def generate_text(size_bytes: int, seed: int = 0) -> str:
+    """Generate deterministic prose-like text of roughly ``size_bytes`` characters."""
+    rng = random.Random(seed)
+    parts: List[str] = []
+    total = 0
+    while total < size_bytes:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30)))
+        sentence = sentence.capitalize() + rng.choice([". ", "! ", "? ", ".\n\n"])
+        parts.append(sentence)
+        total += len(sentence)
+    return "".join(parts)
+
+
+@contextmanager
+def timer() -> Iterator[List[float]]:
+    """Measure the wall-clock time of a block; the elapsed seconds land in result[0]."""
+    result = [0.0]
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result[0] = time.perf_counter() - start
+
+
+class _WhitespaceTokenizer:
+    def tokenize(self, text: str) -> List[str]:
+        return text.split()
+
+
+class FakeEmbedder:
+    """Deterministic stand-in for the embedding model: each text maps to a fixed
+    unit vector derived from its hash, so runs are reproducible and model-free."""
+
+    max_seq_length = 256
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.tokenizer = _WhitespaceTokenizer()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, **kwargs):
+        import numpy as np
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            vectors[row] = np.random.default_rng(seed).standard_normal(self.dimension, dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99 in milliseconds and sequential throughput for a list of call durations."""
+    import numpy as np
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "per_second": round(len(seconds) / sum(seconds), 2) if sum(seconds) else 0.0
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(path: str, benchmark: str, config: Dict[str, Any], cases: Dict[str, Dict[str, float]]) -> str:
+    """Write results in the format read by ``benchmarks.compare``: flat numeric metrics per case."""
+    if not path:
+        path = os.path.join("data", "benchmarks", f"{benchmark}-{git_commit()}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({
+            "benchmark": benchmark,
+            "commit": git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "config": config,
+            "cases": cases
+        }, f, indent=2)
+    return path
@@ -0,0 +1,29 @@
+import argparse
+from app.database import SessionLocal
+from app.services.corpus_io import export_corpus, import_corpus
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a user's documents, chunks and embeddings to or from disk")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="write a corpus export directory")
+    export_parser.add_argument("--owner-id", type=int, required=True)
+    export_parser.add_argument("--output", required=True, help="directory to write")
+    export_parser.add_argument("--dimension", type=int, help="vector dimension (default: the embedding model's)")
+
+    import_parser = subparsers.add_parser("import", help="load a corpus export directory")
+    import_parser.add_argument("--owner-id", type=int, required=True, help="user that will own the documents")
+    import_parser.add_argument("--input", required=True, help="directory written by export")
+
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            print(f"Exporting corpus of user {args.owner_id} to {args.output}...")
+            counts = export_corpus(db, args.owner_id, args.output, args.dimension)
+        else:
+            print(f"Importing corpus from {args.input} for user {args.owner_id}...")
+            counts = import_corpus(db, args.input, args.owner_id)
+    finally:
+        db.close()
+    print(f"Done: {counts['documents']} documents, {counts['chunks']} chunks.")
@@ -0,0 +1,14 @@
+import argparse
+from app.config import settings
+from app.services.embeddings import export_onnx_model
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model for the ONNX backends")
+    parser.add_argument("--output-dir", default=settings.onnx_model_dir)
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--no-quantize", action="store_true", help="skip the int8-quantized variant")
+    args = parser.parse_args()
+
+    print(f"Exporting {args.model} to {args.output_dir}...")
+    export_onnx_model(args.output_dir, args.model, quantize=not args.no_quantize)
+    print("Export completed. Set EMBEDDING_BACKEND=onnx or EMBEDDING_BACKEND=onnx-int8 to use it.")
@@ -1,7 +1,10 @@
-from app.database import create_tables
+import logging
+from app.database import migrate_database
 from app import models  # This import is necessary to register the models
 
 if __name__ == "__main__":
-    print("Creating database tables...")
-    create_tables()
-    print("Database tables created successfully!") 
\ No newline at end of file
+    # Show Alembic's progress; migrate_database leaves logging setup to the caller
+    logging.basicConfig(level=logging.INFO, format="%(levelname)-5.5s [%(name)s] %(message)s")
+    print("Migrating database schema...")
+    migrate_database()
+    print("Database schema is up to date!") 
\ No newline at end of file
@@ -0,0 +1,19 @@
+import argparse
+from app.crud import convert_legacy_embeddings
+from app.database import SessionLocal
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert JSON document embeddings to packed float32")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("Converting legacy JSON embeddings...")
+    db = SessionLocal()
+    try:
+        total = 0
+        for converted in convert_legacy_embeddings(db, args.batch_size):
+            total += converted
+            print(f"Converted {total} embeddings")
+    finally:
+        db.close()
+    print(f"Conversion completed: {total} embeddings converted.")
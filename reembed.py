@@ -0,0 +1,36 @@
+import argparse
+import os
+from app.config import settings
+from app.database import SessionLocal
+from app.services.bulk_reembed import reembed_all_chunks
+from app.services.embeddings import BACKENDS
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Re-embed every document chunk with a pool of processes")
+    parser.add_argument("--workers", type=int, default=max(1, cpus // 4), help="embedding processes")
+    parser.add_argument("--threads", type=int, default=0, help="threads per process (default: cores / workers)")
+    parser.add_argument("--shard-size", type=int, default=2000, help="chunks per shard")
+    parser.add_argument("--backend", choices=BACKENDS, default=settings.embedding_backend)
+    parser.add_argument("--checkpoint", default="./data/reembed_checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    threads = args.threads or max(1, cpus // args.workers)
+
+    print(f"Re-embedding chunks with {args.workers} workers x {threads} threads ({args.backend})...")
+    db = SessionLocal()
+    try:
+        per_worker = reembed_all_chunks(
+            db, args.workers, threads, args.shard_size, args.checkpoint, backend=args.backend
+        )
+    finally:
+        db.close()
+
+    for pid, stats in sorted(per_worker.items()):
+        print(f"Worker {pid}: {stats['rows']} chunks in {stats['seconds']:.1f}s ({stats['rows_per_second']:.1f} chunks/s)")
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    print("Re-embedding completed.")
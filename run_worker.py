@@ -0,0 +1,23 @@
+import argparse
+from app.tasks.celery_app import WORKER_PROFILES, celery_app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start a Celery worker for one queue profile")
+    parser.add_argument("profile", choices=sorted(WORKER_PROFILES), help="queues this worker consumes")
+    parser.add_argument("--concurrency", type=int, help="override the profile's process count")
+    parser.add_argument("--loglevel", default="info")
+    args = parser.parse_args()
+
+    profile = WORKER_PROFILES[args.profile]
+    concurrency = args.concurrency or profile["concurrency"]
+    print(f"Starting {args.profile} worker: queues={','.join(profile['queues'])} "
+          f"concurrency={concurrency} prefetch={profile['prefetch_multiplier']}")
+    celery_app.worker_main([
+        "worker",
+        f"--queues={','.join(profile['queues'])}",
+        f"--concurrency={concurrency}",
+        f"--prefetch-multiplier={profile['prefetch_multiplier']}",
+        f"--hostname={args.profile}@%h",
+        "-O", "fair",  # hand tasks only to idle processes
+        f"--loglevel={args.loglevel}",
+    ])
@@ -0,0 +1,76 @@
+import random
+import string
+
+import pytest
+
+from app.services.chunker import TextChunker
+
+ALPHABET = string.ascii_letters + "     .!?,\n-'"
+
+
+def random_text(rng: random.Random) -> str:
+    """Build a random input mixing prose, punctuation runs, blank lines and very long words."""
+    pieces = []
+    for _ in range(rng.randint(0, 60)):
+        kind = rng.random()
+        if kind < 0.6:
+            pieces.append("".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 80))))
+        elif kind < 0.8:
+            pieces.append(rng.choice([". ", "!!! ", "\n\n", "   ", "?\n"]))
+        else:
+            pieces.append(rng.choice(string.ascii_lowercase) * rng.randint(50, 3000))
+    return "".join(pieces)
+
+
+@pytest.mark.parametrize("max_tokens,overlap_tokens", [(1, 0), (5, 2), (32, 8), (200, 40)])
+def test_chunks_cover_text_within_budget(max_tokens, overlap_tokens):
+    rng = random.Random(max_tokens)
+    chunker = TextChunker(max_tokens, overlap_tokens)
+    for _ in range(200):
+        text = random_text(rng)
+        chunks = list(chunker.iter_chunks(text))
+
+        # No infinite loops: every chunk consumes at least one new character.
+        assert len(chunks) <= sum(1 for char in text if not char.isspace())
+
+        covered = bytearray(len(text))
+        previous_start, previous_end = -1, -1
+        for chunk in chunks:
+            assert chunk.text == text[chunk.start:chunk.end]
+            assert chunk.text.strip() == chunk.text and chunk.text
+            assert chunk.token_count <= max_tokens
+            # Every chunk moves forward and adds text the previous one did not have.
+            assert chunk.start > previous_start and chunk.end > previous_end
+            previous_start, previous_end = chunk.start, chunk.end
+            covered[chunk.start:chunk.end] = b"\x01" * (chunk.end - chunk.start)
+
+        for position, char in enumerate(text):
+            assert covered[position] or char.isspace(), f"character {position} not covered"
+
+
+def test_overlap_carries_trailing_sentences():
+    text = " ".join(f"Sentence number {i} is here." for i in range(50))
+    chunks = list(TextChunker(max_tokens=30, overlap_tokens=12).iter_chunks(text))
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.start < previous.end
+        assert text[current.start:previous.end].startswith("Sentence number")
+
+
+def test_respects_custom_token_counter():
+    text = "alpha beta gamma delta. " * 100
+    chunker = TextChunker(max_tokens=10, overlap_tokens=0, token_counter=lambda s: len(s.split()))
+    for chunk in chunker.iter_chunks(text):
+        assert len(chunk.text.split()) <= 10
+
+
+def test_empty_and_whitespace_inputs():
+    chunker = TextChunker()
+    assert chunker.split("") == []
+    assert chunker.split(" \n\n\t ") == []
+
+
+@pytest.mark.parametrize("max_tokens,overlap_tokens", [(0, 0), (10, 10), (10, -1)])
+def test_rejects_invalid_budgets(max_tokens, overlap_tokens):
+    with pytest.raises(ValueError):
+        TextChunker(max_tokens, overlap_tokens)
@@ -0,0 +1,36 @@
+"""Round trips for the compressed document content column."""
+import zlib
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from app.column_types import compress_text, decompress_text, is_compressed
+
+
+@pytest.mark.parametrize("text", ["", "plain text", "x^2 + y^2", "héllo wörld " * 1000])
+def test_zlib_round_trip(text):
+    data = compress_text(text, "zlib")
+    assert is_compressed(data)
+    assert decompress_text(data) == text
+
+
+def test_legacy_values_pass_through():
+    assert decompress_text("stored before compression") == "stored before compression"
+    # Plain text that starts with the zlib header byte is not mistaken for zlib
+    assert decompress_text("x^2 is a square".encode("utf-8")) == "x^2 is a square"
+    assert not is_compressed(b"x^2 is a square")
+
+
+def test_zstd_round_trip():
+    pytest.importorskip("zstandard")
+    text = "zstd body " * 100
+    data = compress_text(text, "zstd")
+    assert is_compressed(data)
+    assert decompress_text(data) == text
+
+
+def test_compression_shrinks_repetitive_text():
+    text = "the same sentence again. " * 400
+    assert len(compress_text(text, "zlib")) < len(text) // 10
+    assert zlib.decompress(compress_text(text, "zlib")).decode("utf-8") == text
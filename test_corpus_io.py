@@ -0,0 +1,108 @@
+"""Round trip of export_corpus / import_corpus: vectors, missing vectors, re-imports and owner conflicts."""
+import json
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.services.corpus_io import VECTOR_DTYPE, export_corpus, import_corpus
+
+DIMENSION = 4
+
+
+def make_session(path):
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.User(id=user_id, email=f"user{user_id}@example.com") for user_id in (1, 2, 3)])
+    db.commit()
+    return db
+
+
+def vector(seed):
+    return np.arange(DIMENSION, dtype=VECTOR_DTYPE) + seed
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    db = make_session(tmp_path / "source.db")
+    drive_doc = models.Document(title="Drive doc", content="from drive", mime_type="text/plain",
+                                google_file_id="file-a", owner_id=1)
+    upload = models.Document(title="Upload", content="uploaded", mime_type="text/plain", owner_id=1)
+    other = models.Document(title="Someone else's", content="private", mime_type="text/plain", owner_id=2)
+    db.add_all([drive_doc, upload, other])
+    db.flush()
+    db.add_all([
+        models.DocumentChunk(document_id=drive_doc.id, chunk_index=0, content="a0", embedding=vector(0).tobytes()),
+        models.DocumentChunk(document_id=drive_doc.id, chunk_index=1, content="a1", embedding=None),
+        models.DocumentChunk(document_id=upload.id, chunk_index=0, content="u0", embedding=vector(10).tobytes()),
+        models.DocumentChunk(document_id=other.id, chunk_index=0, content="o0", embedding=vector(20).tobytes()),
+    ])
+    db.commit()
+
+    output = tmp_path / "export"
+    assert export_corpus(db, 1, str(output), DIMENSION) == {"documents": 2, "chunks": 3}
+    db.close()
+    return output
+
+
+def chunks_of(db, owner_id):
+    return db.execute(
+        select(models.Document.google_file_id, models.DocumentChunk.content, models.DocumentChunk.embedding)
+        .join(models.Document, models.Document.id == models.DocumentChunk.document_id)
+        .where(models.Document.owner_id == owner_id)
+        .order_by(models.DocumentChunk.content)
+    ).all()
+
+
+def test_export_files(export_dir):
+    manifest = json.loads((export_dir / "manifest.json").read_text())
+    assert manifest["dimension"] == DIMENSION and manifest["chunks"] == 3
+    chunks = [json.loads(line) for line in (export_dir / "chunks.ndjson").read_text().splitlines()]
+    assert [chunk["has_vector"] for chunk in chunks] == [True, False, True]
+    vectors = np.fromfile(export_dir / "vectors.f32", dtype=VECTOR_DTYPE).reshape(3, DIMENSION)
+    assert not vectors[1].any()  # the missing vector is padded with zeros
+
+
+def test_round_trip(export_dir, tmp_path):
+    db = make_session(tmp_path / "target.db")
+    assert import_corpus(db, str(export_dir), 2) == {"documents": 2, "chunks": 3}
+
+    rows = chunks_of(db, 2)
+    assert [(row.google_file_id, row.content) for row in rows] == [("file-a", "a0"), ("file-a", "a1"), (None, "u0")]
+    assert rows[0].embedding == vector(0).tobytes()
+    assert rows[1].embedding is None
+    assert rows[2].embedding == vector(10).tobytes()
+    content = db.execute(select(models.Document.content).where(models.Document.google_file_id == "file-a")).scalar()
+    assert content == "from drive"
+
+
+def test_reimport_replaces_drive_documents(export_dir, tmp_path):
+    db = make_session(tmp_path / "target.db")
+    import_corpus(db, str(export_dir), 2)
+    import_corpus(db, str(export_dir), 2)
+
+    drive_docs = db.execute(
+        select(func.count(models.Document.id)).where(models.Document.google_file_id == "file-a")
+    ).scalar()
+    assert drive_docs == 1
+    drive_chunks = [row.content for row in chunks_of(db, 2) if row.google_file_id == "file-a"]
+    assert drive_chunks == ["a0", "a1"]  # old chunks replaced, not duplicated
+
+
+def test_refuses_documents_of_another_owner(export_dir, tmp_path):
+    db = make_session(tmp_path / "target.db")
+    import_corpus(db, str(export_dir), 2)
+
+    with pytest.raises(ValueError, match="already belongs to user 2"):
+        import_corpus(db, str(export_dir), 3)
+    assert db.execute(select(func.count(models.Document.id)).where(models.Document.owner_id == 3)).scalar() == 0
+    assert len(chunks_of(db, 2)) == 3
+
+
+def test_export_refuses_other_dimension(export_dir, tmp_path):
+    db = sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'source.db'}"))()
+    with pytest.raises(ValueError, match="4-dimensional vector, expected 8"):
+        export_corpus(db, 1, str(tmp_path / "wrong"), 8)
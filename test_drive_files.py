@@ -0,0 +1,98 @@
+"""/auth/google/files through the TestClient: catalog pages, cursors and the first-listing claim."""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import models
+from app.database import get_async_db
+from app.routers import google_auth
+
+
+class RequestSession(AsyncSession):
+    """The request's session; the body streams after the handler returns, so it must not read from it."""
+
+    async def stream(self, *args, **kwargs):
+        raise AssertionError("catalog page streamed on the request's session")
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = tmp_path / "files.db"
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(google_auth, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    request_sessions = async_sessionmaker(async_engine, class_=RequestSession, expire_on_commit=False)
+
+    async def get_request_db():
+        async with request_sessions() as db:
+            yield db
+
+    queued = []
+    monkeypatch.setattr(google_auth, "refresh_drive_catalog", SimpleNamespace(
+        apply_async=lambda args, queue: queued.append(args[0])
+    ))
+
+    app = FastAPI()
+    app.include_router(google_auth.router)
+    app.dependency_overrides[get_async_db] = get_request_db
+    with TestClient(app) as test_client:
+        test_client.engine = create_engine(f"sqlite:///{path}")
+        test_client.queued = queued
+        yield test_client
+        test_client.engine.dispose()
+
+
+def add_user(engine, changes_token=None, files=0):
+    with engine.begin() as connection:
+        user_id = connection.execute(models.User.__table__.insert().values(
+            email="drive@example.com", google_credentials={"token": "t"}, drive_changes_token=changes_token
+        )).inserted_primary_key[0]
+        for n in range(files):
+            connection.execute(models.DriveFile.__table__.insert().values(
+                owner_id=user_id, file_id=f"file-{n}", name=f"File {n}",
+                mime_type="application/pdf" if n % 2 else "text/plain"
+            ))
+    return user_id
+
+
+def test_pages_follow_the_cursor(client):
+    add_user(client.engine, changes_token="42", files=5)
+
+    first = client.get("/auth/google/files", params={"limit": 2}).json()
+    assert first["catalog_ready"] is True
+    assert [file["id"] for file in first["files"]] == ["file-0", "file-1"]
+
+    second = client.get("/auth/google/files", params={"limit": 2, "after": first["next_cursor"]}).json()
+    third = client.get("/auth/google/files", params={"limit": 2, "after": second["next_cursor"]}).json()
+    assert [file["id"] for file in second["files"] + third["files"]] == ["file-2", "file-3", "file-4"]
+    assert third["next_cursor"] is None
+    assert client.queued == []
+
+
+def test_mime_type_filter(client):
+    add_user(client.engine, changes_token="42", files=5)
+    page = client.get("/auth/google/files", params={"mime_types": "application/pdf"}).json()
+    assert [file["id"] for file in page["files"]] == ["file-1", "file-3"]
+
+
+def test_first_listing_is_queued_once(client):
+    user_id = add_user(client.engine)
+
+    for _ in range(3):
+        page = client.get("/auth/google/files").json()
+        assert page == {"catalog_ready": False, "files": [], "next_cursor": None}
+    assert client.queued == [user_id]
+
+
+def test_no_google_user(client):
+    assert client.get("/auth/google/files").status_code == 401
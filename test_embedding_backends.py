@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+import numpy as np
+
+from app.config import settings
+from app.services.embeddings import ONNX_CONFIG_FILE, get_embedding_model
+from benchmarks.utils import generate_text
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(os.path.join(settings.onnx_model_dir, ONNX_CONFIG_FILE)),
+    reason="ONNX model not exported; run python export_onnx_model.py"
+)
+
+# Minimum cosine similarity to the PyTorch embedding, per backend
+PARITY_THRESHOLDS = {"onnx": 0.9999, "onnx-int8": 0.98}
+
+
+def sample_texts():
+    text = generate_text(20_000, seed=7)
+    return [sentence.strip() for sentence in text.split(". ") if sentence.strip()][:200]
+
+
+def cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+@pytest.mark.parametrize("backend", sorted(PARITY_THRESHOLDS))
+def test_backend_matches_sentence_transformers(backend):
+    texts = sample_texts()
+    reference = get_embedding_model("sentence-transformers").encode(texts, convert_to_numpy=True)
+    candidate = get_embedding_model(backend).encode(texts)
+
+    assert candidate.shape == reference.shape
+    assert candidate.dtype == np.float32
+    similarity = cosine(reference, candidate)
+    assert similarity.min() >= PARITY_THRESHOLDS[backend]
+
+    # Retrieval quality: the nearest neighbour of each text is unchanged.
+    queries = texts[:20]
+    reference_top = (get_embedding_model("sentence-transformers").encode(queries) @ reference.T).argsort(axis=1)[:, -2]
+    candidate_top = (get_embedding_model(backend).encode(queries) @ candidate.T).argsort(axis=1)[:, -2]
+    assert (reference_top == candidate_top).mean() >= 0.9
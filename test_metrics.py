@@ -0,0 +1,92 @@
+"""Prometheus text rendering and snapshot merging for app.metrics."""
+import os
+
+import pytest
+
+from app.metrics import (
+    Counter, Gauge, Histogram, REGISTRY, render_prometheus, retire_snapshot, span, write_snapshot
+)
+
+
+@pytest.fixture
+def metrics():
+    created = [
+        Histogram("test_stage_seconds", "Test stage timings.", ["stage"], buckets=(0.1, 1.0)),
+        Counter("test_cache_requests_total", "Test cache lookups.", ["result"]),
+        Gauge("test_index_vectors", "Test index size."),
+    ]
+    yield created
+    for metric in created:
+        REGISTRY.remove(metric)
+
+
+def test_histogram_buckets_are_cumulative(metrics):
+    histogram = metrics[0]
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, stage="embed")
+    lines = render_prometheus().splitlines()
+    assert 'test_stage_seconds_bucket{stage="embed",le="0.1"} 2' in lines
+    assert 'test_stage_seconds_bucket{stage="embed",le="1.0"} 3' in lines
+    assert 'test_stage_seconds_bucket{stage="embed",le="+Inf"} 4' in lines
+    assert 'test_stage_seconds_count{stage="embed"} 4' in lines
+    assert "# TYPE test_stage_seconds histogram" in lines
+
+
+def test_span_records_even_when_block_raises(metrics):
+    histogram = metrics[0]
+    with pytest.raises(RuntimeError):
+        with span(histogram, stage="llm"):
+            raise RuntimeError("boom")
+    assert histogram.totals()[("llm",)][0] == 1
+
+
+def test_worker_snapshots_are_merged(metrics, tmp_path):
+    histogram, counter, gauge = metrics
+    counter.inc(result="hit")
+    histogram.observe(0.5, stage="persist")
+    gauge.set(10)
+    write_snapshot(str(tmp_path / "worker-1.json"))
+    write_snapshot(str(tmp_path / "worker-2.json"))
+
+    lines = render_prometheus(str(tmp_path)).splitlines()
+    assert 'test_cache_requests_total{result="hit"} 3.0' in lines
+    assert 'test_stage_seconds_count{stage="persist"} 3' in lines
+    assert "test_index_vectors 10.0" in lines
+
+
+def test_recycled_worker_totals_survive(metrics, tmp_path):
+    histogram, counter, gauge = metrics
+    path = str(tmp_path / "worker-7.json")
+
+    def start_process():
+        for metric in metrics:
+            metric.reset()
+        retire_snapshot(path)  # as worker_process_init does with a leftover under its PID
+
+    # Recycled cleanly: the snapshot is folded into retired.json at shutdown
+    counter.inc(2, result="hit")
+    histogram.observe(0.5, stage="persist")
+    gauge.set(10)
+    write_snapshot(path)
+    retire_snapshot(path)
+    assert sorted(os.listdir(tmp_path)) == ["retired.json", "retired.lock"]
+
+    # The PID is reused by a process that dies without retiring its snapshot...
+    start_process()
+    counter.inc(result="hit")
+    gauge.set(4)
+    write_snapshot(path)
+
+    # ...and again by one that is still running
+    start_process()
+    counter.inc(result="miss")
+    gauge.set(5)
+    write_snapshot(path)
+
+    for metric in metrics:
+        metric.reset()  # the API process itself has recorded nothing
+    lines = render_prometheus(str(tmp_path)).splitlines()
+    assert 'test_cache_requests_total{result="hit"} 3.0' in lines
+    assert 'test_cache_requests_total{result="miss"} 1.0' in lines
+    assert 'test_stage_seconds_count{stage="persist"} 1' in lines
+    assert [line for line in lines if line.startswith("test_index_vectors ")] == ["test_index_vectors 5.0"]
@@ -0,0 +1,87 @@
+"""ProfilingMiddleware: untriggered requests pass straight through, triggered ones leave a profile."""
+import asyncio
+import json
+import os
+import time
+
+from app.profiling import ProfilingMiddleware
+
+
+async def slow_app(scope, receive, send):
+    time.sleep(0.05)  # blocking work, like a sync handler
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def call(middleware, headers):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/api/v1/qa/ask", "headers": headers}
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+def test_untriggered_request_is_not_profiled(tmp_path):
+    middleware = ProfilingMiddleware(slow_app, output_dir=str(tmp_path))
+    sent = call(middleware, [])
+    assert sent[0]["headers"] == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_header_triggers_profile(tmp_path):
+    middleware = ProfilingMiddleware(slow_app, token="secret", mode="cprofile", interval_ms=1, output_dir=str(tmp_path))
+    sent = call(middleware, [(b"x-profile", b"secret"), (b"x-request-id", b"req-42")])
+    assert (b"x-profile-id", b"req-42") in sent[0]["headers"]
+
+    directory = tmp_path / "req-42"
+    with open(directory / "request.json") as f:
+        request = json.load(f)
+    assert request["status"] == 200 and request["path"] == "/api/v1/qa/ask"
+    assert "slow_app" in (directory / "stacks.folded").read_text()
+    assert (directory / "profile.prof").exists()
+
+
+def test_token_must_match(tmp_path):
+    middleware = ProfilingMiddleware(slow_app, token="secret", output_dir=str(tmp_path))
+    call(middleware, [(b"x-profile", b"guess")])
+    assert os.listdir(tmp_path) == []
+    call(middleware, [(b"x-profile", b"secret")])
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_header_ignored_without_token(tmp_path):
+    middleware = ProfilingMiddleware(slow_app, output_dir=str(tmp_path))
+    sent = call(middleware, [(b"x-profile", b"1")])
+    assert sent[0]["headers"] == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_unsafe_request_id_is_replaced(tmp_path):
+    middleware = ProfilingMiddleware(slow_app, token="secret", output_dir=str(tmp_path))
+    call(middleware, [(b"x-profile", b"secret"), (b"x-request-id", b"../../etc")])
+    call(middleware, [(b"x-profile", b"secret"), (b"x-request-id", b"..")])
+    names = os.listdir(tmp_path)
+    assert len(names) == 2 and all(len(name) == 32 and "." not in name for name in names)
+
+
+def test_reused_request_id_keeps_earlier_profile(tmp_path):
+    middleware = ProfilingMiddleware(slow_app, token="secret", output_dir=str(tmp_path))
+    call(middleware, [(b"x-profile", b"secret"), (b"x-request-id", b"req-1")])
+    sent = call(middleware, [(b"x-profile", b"secret"), (b"x-request-id", b"req-1")])
+    profile_id = dict(sent[0]["headers"])[b"x-profile-id"].decode()
+    assert profile_id != "req-1"
+    assert sorted(os.listdir(tmp_path)) == sorted(["req-1", profile_id])
+
+
+def test_oldest_profiles_are_pruned(tmp_path):
+    middleware = ProfilingMiddleware(slow_app, sample_rate=1.0, output_dir=str(tmp_path), max_profiles=2)
+    for n in range(4):
+        call(middleware, [(b"x-request-id", f"req-{n}".encode())])
+        os.utime(tmp_path / f"req-{n}", (n, n))  # distinct ages, whatever the filesystem's mtime resolution
+    assert sorted(os.listdir(tmp_path)) == ["req-2", "req-3"]
@@ -0,0 +1,107 @@
+"""
+EXPLAIN QUERY PLAN regression suite for the filtered queries on the hot paths
+in app/. Each query must be answered through an index; a plain "SCAN <table>"
+means SQLite fell back to reading the whole table.
+
+The plans are taken on a schema built by the Alembic migrations, starting from
+the tables the old create_tables() startup hook made, so an index that exists
+only in app/models.py fails here too.
+"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, delete, select
+
+from app import models
+from app.database import migrate_database
+from app.services.drive_catalog import catalog_page_statement
+
+# (description, statement) pairs mirroring the queries issued in app/
+HOT_QUERIES = [
+    ("replace_document_chunks: delete old chunks",
+     delete(models.DocumentChunk).where(models.DocumentChunk.document_id == 1)),
+    ("chunks of a document in order",
+     select(models.DocumentChunk).where(models.DocumentChunk.document_id == 1)
+     .order_by(models.DocumentChunk.chunk_index)),
+    ("RAGService.search_similar_chunks: chunk hydration",
+     select(models.DocumentChunk).where(models.DocumentChunk.id == 1)),
+    ("sync_user_documents: document by Drive file id",
+     select(models.Document).where(models.Document.google_file_id == "file-id")),
+    ("documents owned by a user",
+     select(models.Document).where(models.Document.owner_id == 1)),
+    ("legacy embeddings delete",
+     delete(models.DocumentEmbedding).where(models.DocumentEmbedding.document_id == 1)),
+    ("list_files: latest user with Google credentials",
+     select(models.User).where(models.User.google_credentials.isnot(None))
+     .order_by(models.User.id.desc()).limit(1)),
+    ("get_user_by_email",
+     select(models.User).where(models.User.email == "user@example.com")),
+    ("User.items relationship load",
+     select(models.Item).where(models.Item.owner_id == 1)),
+    ("list_files: catalog page",
+     catalog_page_statement(1, after=100, limit=100, mime_types=["application/pdf", "text/plain"])),
+    ("drive catalog: delete removed files",
+     delete(models.DriveFile).where(models.DriveFile.owner_id == 1, models.DriveFile.file_id.in_(["a", "b"]))),
+]
+
+
+# Schema at the Alembic baseline revision, as the old create_tables() hook left it in SQLite
+LEGACY_SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER NOT NULL, email VARCHAR, hashed_password VARCHAR, is_active BOOLEAN,
+        google_credentials JSON, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), updated_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE INDEX ix_users_id ON users (id)",
+    "CREATE UNIQUE INDEX ix_users_email ON users (email)",
+    """CREATE TABLE items (
+        id INTEGER NOT NULL, title VARCHAR, description VARCHAR, owner_id INTEGER,
+        PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES users (id)
+    )""",
+    "CREATE INDEX ix_items_title ON items (title)",
+    "CREATE INDEX ix_items_id ON items (id)",
+    """CREATE TABLE documents (
+        id INTEGER NOT NULL, title VARCHAR, content TEXT, mime_type VARCHAR, google_file_id VARCHAR,
+        owner_id INTEGER, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP), updated_at DATETIME,
+        PRIMARY KEY (id), FOREIGN KEY(owner_id) REFERENCES users (id)
+    )""",
+    "CREATE INDEX ix_documents_id ON documents (id)",
+    "CREATE UNIQUE INDEX ix_documents_google_file_id ON documents (google_file_id)",
+    """CREATE TABLE document_chunks (
+        id INTEGER NOT NULL, content TEXT, embedding BLOB, document_id INTEGER, chunk_index INTEGER,
+        created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        PRIMARY KEY (id), FOREIGN KEY(document_id) REFERENCES documents (id)
+    )""",
+    "CREATE INDEX ix_document_chunks_id ON document_chunks (id)",
+    """CREATE TABLE document_embeddings (
+        id INTEGER NOT NULL, document_id INTEGER, chunk_index INTEGER, chunk_text VARCHAR,
+        embedding_vector VARCHAR, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+        PRIMARY KEY (id), FOREIGN KEY(document_id) REFERENCES documents (id)
+    )""",
+    "CREATE INDEX ix_document_embeddings_id ON document_embeddings (id)",
+]
+
+
+@pytest.fixture(scope="module")
+def connection(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('query_plans') / 'plans.db'}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+    migrate_database(engine)
+    with engine.connect() as connection:
+        yield connection
+    engine.dispose()
+
+
+def full_scans(plan_rows):
+    """Return plan steps that read a whole table without any index."""
+    return [row[3] for row in plan_rows if row[3].startswith("SCAN ") and " USING " not in row[3]]
+
+
+@pytest.mark.parametrize("description,statement", HOT_QUERIES, ids=[query[0] for query in HOT_QUERIES])
+def test_hot_query_uses_index(connection, description, statement):
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    assert not full_scans(plan), f"{description} does a full table scan:\n{sql}\n{plan}"